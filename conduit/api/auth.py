@@ -0,0 +1,50 @@
+"""
+Token authentication of API clients.
+
+Clients log in with `POST /api/users/login` and send the token they get back
+in an `Authorization: Token <token>` header. Tokens are signed, not stored:
+one holds the user id and the session hash of the user (see
+AbstractBaseUser.get_session_auth_hash), so changing the password revokes
+every token, and it expires after API_TOKEN_MAX_AGE seconds.
+
+The user is loaded by the first authentication backend, so API requests use
+the cached viewer of conduit.users.backends like pages do. Session cookies are
+ignored: API views are exempt from CSRF checks, which only cookies need.
+"""
+
+from django.conf import settings
+from django.contrib.auth import load_backend
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+
+SALT = "conduit.api.token"
+
+
+class InvalidToken(Exception):
+    """Raised for a malformed, expired or revoked token (answered with a 401)"""
+
+
+def make_token(user):
+    return signing.dumps([user.pk, user.get_session_auth_hash()], salt=SALT)
+
+
+def get_token_user(request):
+    """The user of the token of `request`, or an AnonymousUser without one"""
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme != "Token" or not token:
+        return AnonymousUser()
+    try:
+        user_id, session_hash = signing.loads(
+            token, salt=SALT, max_age=settings.API_TOKEN_MAX_AGE
+        )
+    except (signing.BadSignature, ValueError):
+        raise InvalidToken
+
+    user = load_backend(settings.AUTHENTICATION_BACKENDS[0]).get_user(user_id)
+    if user is None or not constant_time_compare(
+        session_hash, user.get_session_auth_hash()
+    ):
+        raise InvalidToken
+    return user
@@ -0,0 +1,95 @@
+"""
+JSON representations of the RealWorld API (https://realworld-docs.netlify.app).
+
+Serializers only read what views loaded: the authors and their users joined
+to the rows, the tags prefetched, and the viewer's favorites and follows
+(`Profile._social_graph`). Lists are streamed with `stream_list()` rather
+than built as one object and encoded at once.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# serialized rows per chunk of a streamed list: enough to avoid a write per row
+CHUNK_SIZE = 20
+
+_encoder = DjangoJSONEncoder(separators=(",", ":"))
+
+
+def dumps(data):
+    return _encoder.encode(data)
+
+
+def profile_json(profile, viewer=None):
+    return {
+        "username": profile.user.username,
+        "bio": profile.bio,
+        "image": profile.image,
+        "following": viewer is not None and viewer.is_following(profile),
+    }
+
+
+def article_json(article, viewer=None, body=True):
+    """`article`, without its body for lists (as the specification does)"""
+
+    data = {
+        # the uuid makes slugs unique, as in the URLs of the pages
+        "slug": f"{article.slug}-{article.uuid}",
+        "title": article.title,
+        "description": article.description,
+        "tagList": [tag.name for tag in article.tags.all()],
+        "createdAt": article.created_at,
+        "updatedAt": article.updated_at,
+        "favorited": viewer is not None and viewer.has_favorited(article),
+        "favoritesCount": article.favorites_count,
+        "author": profile_json(article.author, viewer),
+    }
+    if body:
+        data["body"] = article.body
+    return data
+
+
+def comment_json(comment, viewer=None):
+    return {
+        "id": comment.pk,
+        "createdAt": comment.created_at,
+        # comments can't be edited
+        "updatedAt": comment.created_at,
+        "body": comment.body,
+        "author": profile_json(comment.author, viewer),
+    }
+
+
+def user_json(user, token):
+    return {
+        "email": user.email,
+        "token": token,
+        "username": user.username,
+        "bio": user.profile.bio,
+        "image": user.profile.image,
+    }
+
+
+def stream_list(key, rows, serialize, **extra):
+    """
+    Yield the JSON object `{key: [serialize(row), ...], **extra}` in chunks
+    of CHUNK_SIZE rows: the response holds one chunk at a time, never the
+    encoding of the whole list.
+    """
+
+    yield "{%s:[" % dumps(key)
+    separator = ""
+    chunk = []
+    for row in rows:
+        chunk.append(dumps(serialize(row)))
+        if len(chunk) == CHUNK_SIZE:
+            yield separator + ",".join(chunk)
+            separator = ","
+            chunk = []
+    if chunk:
+        yield separator + ",".join(chunk)
+    yield "]"
+    for name, value in extra.items():
+        yield f",{dumps(name)}:{dumps(value)}"
+    yield "}"
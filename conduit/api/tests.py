@@ -0,0 +1,167 @@
+import json
+
+from django.test import override_settings
+from django.urls import reverse
+
+from config.instrumentation import instrument
+from conduit.articles.models import Article, Comment
+from conduit.articles.tags import get_or_create_tags
+from conduit.testing import ConduitTestCase
+
+from .auth import make_token
+
+
+def _json(response):
+    if response.streaming:
+        return json.loads(b"".join(response.streaming_content))
+    return json.loads(response.content)
+
+
+class ApiTestCase(ConduitTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.reader.profile.follow(cls.author.profile)
+        tags = get_or_create_tags(["tag0", "tag1"])
+        # more than a chunk of a streamed list
+        cls.articles = []
+        for i in range(25):
+            article = cls.create_article(f"Article {i}")
+            article.tags.set(
+                tags[: i % 3], through_defaults={"created_at": article.created_at}
+            )
+            Comment.objects.create(
+                article=article, body="comment", author=cls.reader.profile
+            )
+            cls.articles.append(article)
+        cls.reader.profile.favorite(cls.articles[0])
+
+    def get(self, name, kwargs=None, token=None, **params):
+        headers = {"Authorization": f"Token {token}"} if token else {}
+        return self.client.get(reverse(name, kwargs=kwargs), params, headers=headers)
+
+    def article_kwargs(self, article):
+        return {"slug": article.slug, "uuid": article.uuid}
+
+
+class ApiTests(ApiTestCase):
+    def test_articles(self):
+        data = _json(self.get("api_articles", limit=10, offset=20))
+        self.assertEqual(data["articlesCount"], 25)
+        self.assertEqual(
+            [article["title"] for article in data["articles"]],
+            [f"Article {i}" for i in range(4, -1, -1)],
+        )
+        self.assertNotIn("body", data["articles"][0])
+        self.assertEqual(data["articles"][-1]["tagList"], [])
+
+        data = _json(self.get("api_articles", tag="tag1", favorited="reader"))
+        self.assertEqual(data["articlesCount"], 0)
+        data = _json(self.get("api_articles", tag="tag1", author="author"))
+        self.assertEqual(data["articlesCount"], 8)
+
+    def test_cursor(self):
+        tagged = Article.objects.filter(tags__slug="tag0")
+        for params, expected in [({}, Article.objects), ({"tag": "tag0"}, tagged)]:
+            titles, cursor = [], ""
+            while cursor is not None:
+                response = self.get("api_articles", cursor=cursor, limit=7, **params)
+                data = _json(response)
+                self.assertNotIn("articlesCount", data)
+                titles += [article["title"] for article in data["articles"]]
+                cursor = data["nextCursor"]
+            self.assertEqual(len(titles), len(set(titles)))
+            self.assertEqual(len(titles), expected.count())
+        self.assertEqual(self.get("api_articles", cursor="nope").status_code, 422)
+
+    def test_authentication(self):
+        response = self.client.post(
+            reverse("api_login"),
+            {"user": {"email": "reader@example.com", "password": "pw"}},
+            content_type="application/json",
+        )
+        token = _json(response)["user"]["token"]
+        user = _json(self.get("api_user", token=token))["user"]
+        self.assertEqual(user["username"], "reader")
+
+        data = _json(self.get("api_feed", token=token, limit=1))
+        self.assertEqual(data["articlesCount"], 25)
+        data = _json(self.get("api_articles", token=token, offset=24))
+        article = data["articles"][0]
+        self.assertTrue(article["favorited"])
+        self.assertTrue(article["author"]["following"])
+
+        self.assertEqual(self.get("api_feed").status_code, 401)
+        self.assertEqual(self.get("api_feed", token=token + "x").status_code, 401)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.set_password("other")
+            self.reader.save()
+        self.assertEqual(self.get("api_feed", token=token).status_code, 401)
+
+    def test_comments(self):
+        article = self.articles[0]
+        url = reverse("api_comments", kwargs=self.article_kwargs(article))
+        headers = {"Authorization": f"Token {make_token(self.author)}"}
+        body = {"comment": {"body": "hi"}}
+        response = self.client.post(url, body, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+        response = self.client.post(
+            url, body, content_type="application/json", headers=headers
+        )
+        comment = _json(response)["comment"]
+        self.assertEqual(comment["author"]["username"], "author")
+
+        data = _json(self.client.get(url))
+        bodies = [comment["body"] for comment in data["comments"]]
+        self.assertEqual(bodies, ["hi", "comment"])
+
+        kwargs = {**self.article_kwargs(article), "pk": comment["id"]}
+        url = reverse("api_comment", kwargs=kwargs)
+        self.assertEqual(self.client.delete(url).status_code, 401)
+        self.assertEqual(self.client.delete(url, headers=headers).status_code, 200)
+        self.assertFalse(Comment.objects.filter(pk=comment["id"]).exists())
+
+    def test_detail(self):
+        article = self.articles[1]
+        data = _json(self.get("api_article", self.article_kwargs(article)))
+        self.assertEqual(data["article"]["body"], "body")
+        self.assertEqual(data["article"]["tagList"], ["tag0"])
+
+        token = make_token(self.reader)
+        data = _json(self.get("api_profile", {"username": "author"}, token=token))
+        self.assertTrue(data["profile"]["following"])
+        response = self.get("api_profile", {"username": "nobody"})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(QUERY_BUDGETS_STRICT=True)
+class ApiQueryCountTests(ApiTestCase):
+    """Queries run by each endpoint, the same whatever the number of rows"""
+
+    def count_queries(self, *args, **kwargs):
+        with instrument() as stats:
+            response = self.get(*args, **kwargs)
+            # the body is streamed after the view returned
+            self.assertEqual(response.status_code, 200)
+            _json(response)
+        return stats.query_count
+
+    def test_endpoints(self):
+        token = make_token(self.reader)
+        kwargs = self.article_kwargs(self.articles[0])
+        # tag, page, count, tags
+        self.assertEqual(self.count_queries("api_articles", tag="tag0", limit=2), 4)
+        # the viewer's user and profile, and social graph, are loaded once
+        self.assertEqual(self.count_queries("api_articles", token=token), 5)
+        self.assertEqual(
+            self.count_queries("api_articles", token=token, limit=50), 3
+        )
+        self.assertEqual(self.count_queries("api_articles", cursor="", limit=50), 2)
+        self.assertEqual(self.count_queries("api_feed", token=token, limit=50), 3)
+        self.assertEqual(self.count_queries("api_feed", token=token, cursor=""), 2)
+        self.assertEqual(self.count_queries("api_article", kwargs, token=token), 2)
+        self.assertEqual(self.count_queries("api_comments", kwargs, token=token), 2)
+        self.assertEqual(
+            self.count_queries("api_profile", {"username": "author"}, token=token), 1
+        )
+        self.assertEqual(self.count_queries("api_user", token=token), 0)
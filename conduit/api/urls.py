@@ -0,0 +1,15 @@
+from django.urls import path
+
+from . import views
+
+# the endpoints of the RealWorld specification, under /api/
+urlpatterns = [
+    path("users/login", views.login, name="api_login"),
+    path("user", views.current_user, name="api_user"),
+    path("profiles/<str:username>", views.profile_detail, name="api_profile"),
+    path("articles", views.article_list, name="api_articles"),
+    path("articles/feed", views.article_feed, name="api_feed"),
+    path("articles/<slug:slug>-<uuid:uuid>", views.article_detail, name="api_article"),
+    path("articles/<slug:slug>-<uuid:uuid>/comments", views.comments, name="api_comments"),
+    path("articles/<slug:slug>-<uuid:uuid>/comments/<int:pk>", views.comment_delete, name="api_comment"),
+]
@@ -0,0 +1,297 @@
+import functools
+import json
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db.models import prefetch_related_objects
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.text import slugify
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from conduit.articles import live
+from conduit.articles.feeds import (
+    feed_queryset,
+    follows_feed,
+    follows_queryset,
+    tag_feed,
+)
+from conduit.articles.forms import CommentForm
+from conduit.articles.models import Article, Comment, Tag
+from conduit.articles.pagination import InvalidCursor, paginate_request
+from conduit.users.models import Profile
+from config.instrumentation import query_budget
+
+from .auth import InvalidToken, get_token_user, make_token
+from .serializers import (
+    article_json,
+    comment_json,
+    profile_json,
+    stream_list,
+    user_json,
+)
+
+
+class InvalidParameter(Exception):
+    """Raised for a query parameter or a body that can't be used (a 422)"""
+
+    def __init__(self, name, message="is invalid"):
+        self.name = name
+        self.message = message
+
+
+def _error(status, name, message):
+    # the error format of the specification
+    return JsonResponse({"errors": {name: [message]}}, status=status)
+
+
+def api_view(*methods, login_required=False):
+    """
+    Make a view an API endpoint: authenticated by token (see auth.py), exempt
+    from CSRF checks, answering errors in JSON.
+    """
+
+    def decorator(view):
+        @csrf_exempt
+        @require_http_methods(methods)
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                request.user = get_token_user(request)
+            except InvalidToken:
+                return _error(401, "token", "is invalid")
+            if login_required and not request.user.is_authenticated:
+                return _error(401, "token", "is missing")
+            try:
+                return view(request, *args, **kwargs)
+            except Http404:
+                return _error(404, "body", "not found")
+            except InvalidCursor:
+                return _error(422, "cursor", "is invalid")
+            except InvalidParameter as exc:
+                return _error(422, exc.name, exc.message)
+
+        return wrapper
+
+    return decorator
+
+
+def _viewer(request):
+    return request.user.profile if request.user.is_authenticated else None
+
+
+def _int_parameter(request, name, default, maximum=None):
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        raise InvalidParameter(name)
+    if value < 0:
+        raise InvalidParameter(name)
+    return min(value, maximum) if maximum is not None else value
+
+
+def _limit(request, default):
+    return _int_parameter(request, "limit", default, settings.API_MAX_LIMIT) or 1
+
+
+def _page(request, queryset, limit, count=None):
+    """
+    Rows of `queryset` for the pagination parameters of `request`, and the
+    fields describing the page.
+
+    `?cursor=` (empty for the first page) selects keyset pagination: the
+    response has a `nextCursor` to pass back, and each page costs the same
+    however deep it is. `?offset=` is the specification's pagination,
+    which counts and skips rows: `count`, if given, names the total count.
+    """
+
+    if "cursor" in request.GET:
+        page = paginate_request(request, queryset, page_size=limit)
+        return page.object_list, {"nextCursor": page.next_cursor}
+
+    offset = _int_parameter(request, "offset", 0)
+    rows = list(queryset.order_by("-created_at", "-pk")[offset : offset + limit])
+    return rows, ({count: queryset.count()} if count else {})
+
+
+def _articles_response(request, articles, extra):
+    viewer = _viewer(request)
+    # the queries run here, in the view: streaming only encodes the rows
+    prefetch_related_objects(articles, "tags")
+    if viewer is not None:
+        viewer.favorited_ids
+
+    def serialize(article):
+        return article_json(article, viewer, body=False)
+
+    return StreamingHttpResponse(
+        stream_list("articles", articles, serialize, **extra),
+        content_type="application/json",
+    )
+
+
+@query_budget(8)
+@api_view("GET")
+def article_list(request):
+    """Articles filtered by `tag`, `author` and `favorited` (a username)"""
+
+    limit = _limit(request, settings.ARTICLES_PAGE_SIZE)
+    queryset = Article.objects.all()
+    tag = None
+    if "tag" in request.GET:
+        tag = Tag.objects.filter(slug=slugify(request.GET["tag"])).first()
+        if tag is None:
+            queryset = queryset.none()
+    if "author" in request.GET:
+        queryset = queryset.filter(author__user__username=request.GET["author"])
+    if "favorited" in request.GET:
+        queryset = queryset.filter(
+            favorited__user__username=request.GET["favorited"]
+        )
+
+    filters = {"author", "favorited"} & request.GET.keys()
+    if tag is not None and "cursor" in request.GET and not filters:
+        # the tag feed of the pages, a range of its index
+        page = tag_feed(request, tag, page_size=limit)
+        articles, extra = page.object_list, {"nextCursor": page.next_cursor}
+    else:
+        if tag is not None:
+            queryset = queryset.filter(tags=tag)
+        articles, extra = _page(
+            request, feed_queryset(queryset), limit, count="articlesCount"
+        )
+    return _articles_response(request, articles, extra)
+
+
+@query_budget(9)
+@api_view("GET", login_required=True)
+def article_feed(request):
+    """Articles of the profiles the user follows"""
+
+    limit = _limit(request, settings.ARTICLES_PAGE_SIZE)
+    if "cursor" in request.GET:
+        # the materialized timeline when it's enabled, as for the page
+        page = follows_feed(request, page_size=limit)
+        articles, extra = page.object_list, {"nextCursor": page.next_cursor}
+    else:
+        articles, extra = _page(
+            request,
+            follows_queryset(request.user.profile),
+            limit,
+            count="articlesCount",
+        )
+    return _articles_response(request, articles, extra)
+
+
+def _get_article(slug, uuid):
+    return get_object_or_404(
+        Article.objects.select_related("author__user"), slug=slug, uuid=uuid
+    )
+
+
+@query_budget(5)
+@api_view("GET")
+def article_detail(request, slug, uuid):
+    article = _get_article(slug, uuid)
+    prefetch_related_objects([article], "tags")
+    return JsonResponse({"article": article_json(article, _viewer(request))})
+
+
+@query_budget(6)
+@api_view("GET", "POST")
+def comments(request, slug, uuid):
+    """Comments of an article, newest first, or a new one for POST requests"""
+
+    if request.method == "POST":
+        return _comment_create(request, slug, uuid)
+    article = get_object_or_404(Article.objects.only("pk"), slug=slug, uuid=uuid)
+    viewer = _viewer(request)
+    if viewer is not None:
+        viewer.following_ids
+    comments, extra = _page(
+        request,
+        article.comments.select_related("author__user"),
+        _limit(request, settings.COMMENTS_PAGE_SIZE),
+    )
+
+    def serialize(comment):
+        return comment_json(comment, viewer)
+
+    return StreamingHttpResponse(
+        stream_list("comments", comments, serialize, **extra),
+        content_type="application/json",
+    )
+
+
+def _json_body(request, key):
+    try:
+        data = json.loads(request.body)[key]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidParameter("body", f"must be a JSON object with a {key!r} key")
+    if not isinstance(data, dict):
+        raise InvalidParameter(key)
+    return data
+
+
+def _comment_create(request, slug, uuid):
+    if not request.user.is_authenticated:
+        return _error(401, "token", "is missing")
+    article = _get_article(slug, uuid)
+    form = CommentForm(_json_body(request, "comment"))
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=422)
+
+    comment = form.save(commit=False)
+    comment.author = request.user.profile
+    comment.article = article
+    comment.save()
+    # no origin: the pages of the user don't know about it either
+    live.publish(article.pk, "comment", live.comment_added(comment))
+    return JsonResponse(
+        {"comment": comment_json(comment, request.user.profile)}, status=201
+    )
+
+
+@api_view("DELETE", login_required=True)
+def comment_delete(request, slug, uuid, pk):
+    comment = get_object_or_404(
+        Comment, pk=pk, article__slug=slug, article__uuid=uuid
+    )
+    if comment.author_id != request.user.profile.pk:
+        return _error(403, "comment", "is not yours")
+
+    live.publish(comment.article_id, "comment-deleted", live.comment_deleted(pk))
+    comment.delete()
+    return JsonResponse({})
+
+
+@query_budget(4)
+@api_view("GET")
+def profile_detail(request, username):
+    profile = get_object_or_404(
+        Profile.objects.select_related("user"), user__username=username
+    )
+    return JsonResponse({"profile": profile_json(profile, _viewer(request))})
+
+
+@api_view("POST")
+def login(request):
+    """Exchange an email and a password for a token"""
+
+    credentials = _json_body(request, "user")
+    user = authenticate(
+        request,
+        email=credentials.get("email"),
+        password=credentials.get("password"),
+    )
+    if user is None:
+        return _error(401, "email or password", "is invalid")
+    return JsonResponse({"user": user_json(user, make_token(user))})
+
+
+@query_budget(2)
+@api_view("GET", login_required=True)
+def current_user(request):
+    token = request.headers["Authorization"].partition(" ")[2]
+    return JsonResponse({"user": user_json(request.user, token)})
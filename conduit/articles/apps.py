@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class ArticlesConfig(AppConfig):
-    name = 'conduit.articles'
\ No newline at end of file
+    name = 'conduit.articles'
+
+    def ready(self):
+        import conduit.articles.signals
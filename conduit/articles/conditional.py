@@ -0,0 +1,76 @@
+"""
+Conditional GET for the feed, article and profile pages.
+
+Views compute the ETag of a page from the versions of what it shows, before
+rendering anything: the `updated_at` and counters of its articles, the
+fragment versions of the profiles shown (see conduit.articles.fragments) and
+the version of the viewer's favorites and follows, dropped by the receivers
+in conduit.articles.signals. When it matches the copy of the client, the
+page isn't rendered, which is most of its cost, and a 304 is returned.
+
+No Last-Modified header is sent: no single date covers the profiles and the
+viewer's state, and If-None-Match takes precedence over it anyway.
+"""
+
+import hashlib
+
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import quote_etag
+
+from . import fragments
+
+
+def article_version(article):
+    return (
+        article.pk,
+        article.updated_at.isoformat(),
+        article.favorites_count,
+        article.comments_count,
+    )
+
+
+def page_etag(request, articles=(), profiles=(), extra=()):
+    """
+    ETag of the page shown to the current viewer, made of `articles`, of the
+    profiles of their authors and of the users with ids `profiles`, and of
+    anything else that identifies its content in `extra`
+    """
+
+    user = request.user
+    keys = sorted(
+        {("author", user_id) for user_id in profiles}
+        | {("author", article.author.user_id) for article in articles}
+    )
+    if user.is_authenticated:
+        keys.append(("viewer", user.profile.pk))
+    versions = fragments.get_versions(keys)
+
+    parts = [
+        user.pk,
+        # forms in the page carry a token valid for this CSRF secret only
+        request.META.get("CSRF_COOKIE"),
+        bool(request.headers.get("HX-Request")),
+        [article_version(article) for article in articles],
+        [versions[key] for key in keys],
+        list(extra),
+    ]
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False)
+    return quote_etag(digest.hexdigest())
+
+
+def conditional_render(request, etag, render):
+    """Return a 304 if the client has the page with `etag`, else `render()` it"""
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render()
+    response.headers["ETag"] = etag
+    # pages are per viewer: browsers keep them but always revalidate them,
+    # including the ones prefetched by rel="prefetch" links
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Cookie", "HX-Request"])
+    return response
@@ -0,0 +1,48 @@
+from django.conf import settings
+
+from .models import Article, ArticleTag
+from .pagination import paginate, paginate_request
+from .timeline import timeline_page
+
+
+def feed_queryset(queryset):
+    """
+    Prepare an Article queryset for rendering previews.
+
+    Authors and their users are joined in the same query and the favorites
+    count is a column of the article, so rendering a page of previews doesn't
+    run any query per article. Bodies aren't shown in previews: they aren't
+    loaded.
+    """
+
+    return queryset.select_related("author__user").defer("body", "body_html")
+
+
+def follows_queryset(profile):
+    """The articles written by the profiles `profile` follows, unordered"""
+    return feed_queryset(Article.objects.filter(author__in=profile.follows.all()))
+
+
+def follows_feed(request, page_size=None):
+    """Page of the articles written by the profiles the current user follows"""
+
+    profile = request.user.profile
+    if settings.TIMELINE_ENABLED:
+        return timeline_page(profile, request.GET.get("cursor"), page_size)
+    return paginate_request(request, follows_queryset(profile), page_size=page_size)
+
+
+def tag_feed(request, tag, page_size=None):
+    """Page of the articles tagged with `tag`"""
+
+    page = paginate(
+        ArticleTag.objects.filter(tag=tag)
+        .select_related("article__author__user")
+        .defer("article__body", "article__body_html"),
+        request.GET.get("cursor"),
+        page_size,
+        key=("created_at", "article_id"),
+    )
+    page.object_list = [tagging.article for tagging in page]
+    return page
+
@@ -1,15 +1,35 @@
 from django import forms
 
 from .models import Article, Comment
+from .tags import get_or_create_tags, parse_tags
 
 
 class ArticleForm(forms.ModelForm):
+    tag_list = forms.CharField(required=False, max_length=1000)
+
     class Meta:
         model = Article
         fields = ["title", "description", "body"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.initial.setdefault(
+                "tag_list", " ".join(tag.name for tag in self.instance.tags.all())
+            )
+
+    def clean_tag_list(self):
+        return parse_tags(self.cleaned_data["tag_list"])
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        self.instance.tags.set(
+            get_or_create_tags(self.cleaned_data["tag_list"]),
+            through_defaults={"created_at": self.instance.created_at},
+        )
         
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
-        fields = ["body"]
\ No newline at end of file
+        fields = ["body"]
@@ -0,0 +1,104 @@
+"""
+Cached article previews.
+
+The part of a preview that is the same for every viewer (author block, date,
+title, description, tags) is cached under a key made of the article id and two
+versions: one of the article and one of its author. Saving either one drops
+its version, so the next render uses a fresh key. The favorite button, which
+depends on the viewer, is rendered on every request and spliced into the
+cached HTML in place of a placeholder.
+"""
+
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.template import Context
+from django.utils.safestring import mark_safe
+
+FAVORITE_BUTTON = mark_safe("<!-- favorite-button -->")
+# part of the preview keys: bump it when article_preview.html changes, so that
+# the previews cached before aren't served (2: tags aren't links)
+PREVIEW_VERSION = 2
+
+
+def _version_key(kind, pk):
+    return f"fragment-version:{kind}:{pk}"
+
+
+def get_versions(keys):
+    """
+    Return the current version of each `(kind, pk)` in `keys`.
+
+    Missing versions (never set, invalidated or evicted) are replaced by new
+    random ones rather than a default value, so a fragment cached under an
+    older version can never be served again.
+    """
+
+    cache_keys = {key: _version_key(*key) for key in keys}
+    versions = cache.get_many(cache_keys.values())
+    missing = {
+        cache_key: uuid4().hex
+        for cache_key in cache_keys.values()
+        if cache_key not in versions
+    }
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return {key: versions[cache_key] for key, cache_key in cache_keys.items()}
+
+
+def invalidate(kind, pk):
+    """Drop the version of `(kind, pk)` once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(_version_key(kind, pk)))
+
+
+def render_previews(context, articles):
+    """Render the previews of `articles`, reusing the cached ones"""
+
+    articles = list(articles)
+    engine = context.template.engine
+    versions = get_versions(
+        [("article", article.pk) for article in articles]
+        + [("author", article.author.user_id) for article in articles]
+    )
+    keys = {
+        article.pk: "article-preview:{}:{}:{}:{}".format(
+            PREVIEW_VERSION,
+            article.pk,
+            versions["article", article.pk],
+            versions["author", article.author.user_id],
+        )
+        for article in articles
+    }
+
+    cached = cache.get_many(keys.values())
+    # only the previews being rendered need their tags
+    prefetch_related_objects(
+        [article for article in articles if keys[article.pk] not in cached], "tags"
+    )
+    rendered = {}
+    preview_template = engine.get_template("article_preview.html")
+    favorite_template = engine.get_template("article_favorite.html")
+
+    html = []
+    for article in articles:
+        preview = cached.get(keys[article.pk])
+        if preview is None:
+            # rendered without the request context: nothing viewer-specific
+            preview = preview_template.render(
+                Context(
+                    {"article": article, "favorite_button": FAVORITE_BUTTON},
+                    autoescape=context.autoescape,
+                )
+            )
+            rendered[keys[article.pk]] = preview
+        with context.push(article=article):
+            favorite = favorite_template.render(context)
+        html.append(preview.replace(FAVORITE_BUTTON, favorite, 1))
+
+    if rendered:
+        cache.set_many(rendered, timeout=settings.ARTICLE_PREVIEW_CACHE_TIMEOUT)
+    return mark_safe("".join(html))
@@ -0,0 +1,226 @@
+"""
+Live updates of article pages, over Server-Sent Events.
+
+Article pages open an event stream on `article_events` with the htmx SSE
+extension. The views changing an article `publish()` its new comments, its
+deleted comments and its favorites count once their transaction commits.
+Events are HTML fragments of out-of-band swaps, htmx applies them as they are.
+
+Events go through the backend chosen by LIVE_EVENTS_BACKEND: `LocalBackend`
+hands them to the streams of this process, `RedisBackend` to those of every
+process through Redis pub/sub. Either way, the `broker` of each process fans
+them out to its streams: a queue per stream, served by the event loop of an
+ASGI worker, so idle streams cost no thread and a worker holds thousands.
+WSGI servers would need a thread per stream: LIVE_EVENTS_ENABLED is only set
+for ASGI deployments, and pages only open streams when it is.
+"""
+
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+from django.utils.module_loading import import_string
+
+# how long browsers wait before reconnecting a dropped stream, in milliseconds
+RECONNECT_DELAY = 3000
+
+
+def _channel(article_id):
+    return f"article:{article_id}"
+
+
+class Subscription:
+    """The queue of the events of a stream, owned by the loop serving it"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.LIVE_EVENTS_QUEUE_SIZE)
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # a client too slow to keep up misses events rather than using memory
+            pass
+
+
+class Broker:
+    """Fan-out of the events of this process to its streams"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channel):
+        subscription = Subscription()
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, channel, subscription):
+        with self._lock:
+            self._subscriptions[channel].discard(subscription)
+            if not self._subscriptions[channel]:
+                del self._subscriptions[channel]
+
+    def deliver(self, channel, message):
+        """Queue `message` for the streams of `channel`, from any thread"""
+
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # its loop is closed: the stream is going away
+                pass
+
+
+broker = Broker()
+
+
+class EventBackend:
+    """Base class of the backends carrying events to the brokers"""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, channel, message):
+        """Send `message` to the streams of `channel`"""
+        raise NotImplementedError
+
+    def listen(self):
+        """Start receiving events for the broker of this process, if needed"""
+
+
+class LocalBackend(EventBackend):
+    """Events reach the streams of the process publishing them only"""
+
+    def publish(self, channel, message):
+        self.broker.deliver(channel, message)
+
+
+class RedisBackend(EventBackend):
+    """
+    Events go through Redis pub/sub (LIVE_EVENTS_REDIS_URL) and reach the
+    streams of every process, e.g. published by WSGI workers and streamed by
+    ASGI ones. Requires the redis package.
+
+    Each process subscribes once, from a thread, whatever its number of
+    streams.
+    """
+
+    prefix = "conduit:live:"
+
+    def __init__(self, broker):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                "LIVE_EVENTS_BACKEND = RedisBackend requires the redis package."
+            )
+        super().__init__(broker)
+        self.redis = redis
+        self.client = redis.Redis.from_url(settings.LIVE_EVENTS_REDIS_URL)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def publish(self, channel, message):
+        self.client.publish(self.prefix + channel, json.dumps(message))
+
+    def listen(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="live-events", daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + "*")
+                for message in pubsub.listen():
+                    channel = message["channel"].decode()[len(self.prefix) :]
+                    self.broker.deliver(channel, json.loads(message["data"]))
+            except self.redis.ConnectionError:
+                # streams miss the events published meanwhile
+                time.sleep(1)
+
+
+@functools.cache
+def get_backend():
+    """The configured backend, shared by the whole process"""
+    return import_string(settings.LIVE_EVENTS_BACKEND)(broker)
+
+
+def publish(article_id, event, html, origin=None):
+    """
+    Send the `event` of article `article_id`, an `html` fragment, to its
+    streams once the current transaction commits. Streams of the user
+    `origin` skip it: their page already got the change in the response.
+    """
+
+    message = {"event": event, "html": str(html), "origin": origin}
+    transaction.on_commit(
+        lambda: get_backend().publish(_channel(article_id), message)
+    )
+
+
+def comment_added(comment):
+    # rendered without a user: no delete button, whoever receives it
+    return render_to_string(
+        "live_comment.html", {"comment": comment, "article": comment.article}
+    )
+
+
+def comment_deleted(comment_id):
+    return format_html(
+        '<div id="comment-{}" hx-swap-oob="delete"></div>', comment_id
+    )
+
+
+def favorites_count(article):
+    return format_html(
+        "<span hx-swap-oob=\"innerHTML:[data-favorites-count='{}']\">{}</span>",
+        article.pk,
+        article.favorites_count,
+    )
+
+
+def _format(message):
+    lines = [f"event: {message['event']}"]
+    lines += [f"data: {line}" for line in message["html"].splitlines()]
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream(article_id, viewer_id=None):
+    """Server-Sent Events of article `article_id`, for the user `viewer_id`"""
+
+    get_backend().listen()
+    channel = _channel(article_id)
+    subscription = broker.subscribe(channel)
+    try:
+        yield f"retry: {RECONNECT_DELAY}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(), settings.LIVE_EVENTS_HEARTBEAT
+                )
+            except TimeoutError:
+                # keeps proxies from closing idle streams
+                yield ": heartbeat\n\n"
+                continue
+            if viewer_id is None or message["origin"] != viewer_id:
+                yield _format(message)
+    finally:
+        broker.unsubscribe(channel, subscription)
@@ -0,0 +1,162 @@
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from config.benchmarks import PERCENTILES, git_revision, percentile
+from config.instrumentation import instrument
+from conduit.articles.models import Article
+from conduit.users.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency percentiles and query counts of the hot views on "
+        "the current database (see generate_fixtures), and append the results "
+        "to a JSON lines file to compare them across commits"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Measured requests per view"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=20, help="Unmeasured requests per view"
+        )
+        parser.add_argument(
+            "--output",
+            default=settings.BASE_DIR / "benchmarks.jsonl",
+            type=Path,
+            help="File the results are appended to (default: benchmarks.jsonl)",
+        )
+        parser.add_argument("--label", default="", help="Stored with the results")
+        parser.add_argument(
+            "--host", default="localhost", help="Host header, must be allowed"
+        )
+
+    def handle(self, *args, requests, warmup, output, label, host, **options):
+        viewer = (
+            Profile.objects.annotate(following=Count("follows"))
+            .select_related("user")
+            .order_by("-following")
+            .first()
+        )
+        article = Article.objects.order_by("-comments_count").first()
+        if viewer is None or article is None:
+            raise CommandError("The database is empty: run generate_fixtures first.")
+        author = Profile.objects.select_related("user").order_by("-followers_count")[0]
+
+        article_kwargs = {"slug": article.slug, "uuid": article.uuid}
+        anonymous = Client(HTTP_HOST=host)
+        client = Client(HTTP_HOST=host)
+        client.force_login(viewer.user)
+        htmx = {"HX-Request": "true"}
+
+        scenarios = {
+            "home (anonymous)": (anonymous.get, reverse("home"), {}),
+            "home": (client.get, reverse("home"), {}),
+            "home_feed": (client.get, reverse("home_feed"), {}),
+            "article_detail": (
+                client.get,
+                reverse("article_detail", kwargs=article_kwargs),
+                {},
+            ),
+            "profile_detail": (
+                client.get,
+                reverse("profile_detail", args=[author.user.username]),
+                {},
+            ),
+            # each request flips the state: an even count leaves it unchanged
+            "article_favorite": (
+                client.post,
+                reverse("article_favorite", kwargs=article_kwargs),
+                htmx,
+            ),
+            "profile_follow": (
+                client.post,
+                reverse("profile_follow", args=[author.user.username]),
+                htmx,
+            ),
+        }
+        requests += requests % 2
+        warmup += warmup % 2
+
+        # one log line per request would drown the results
+        logging.getLogger("conduit.instrumentation").setLevel(logging.WARNING)
+        results = {}
+        for name, (method, url, headers) in scenarios.items():
+            results[name] = self.measure(method, url, headers, requests, warmup)
+            self.write_result(name, results[name])
+
+        run = {
+            "revision": git_revision(),
+            "label": label,
+            "date": timezone.now().isoformat(),
+            "requests": requests,
+            "results": results,
+        }
+        previous = self.last_run(output)
+        with open(output, "a") as f:
+            f.write(json.dumps(run) + "\n")
+        self.stdout.write(f"Results appended to {output}.")
+        if previous:
+            self.compare(previous, run)
+
+    def measure(self, method, url, headers, requests, warmup):
+        for _ in range(warmup):
+            method(url, headers=headers)
+
+        latencies, queries = [], []
+        for _ in range(requests):
+            with instrument() as stats:
+                start = time.perf_counter()
+                response = method(url, headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f"{url} answered {response.status_code}")
+            queries.append(stats.query_count)
+
+        latencies.sort()
+        return {
+            **{f"p{p}_ms": round(percentile(latencies, p), 2) for p in PERCENTILES},
+            "mean_ms": round(statistics.fmean(latencies), 2),
+            "queries": max(queries),
+        }
+
+    def write_result(self, name, result):
+        self.stdout.write(
+            f"{name:>18}: "
+            + " ".join(f"p{p} {result[f'p{p}_ms']:7.2f}ms" for p in PERCENTILES)
+            + f" {result['queries']:3d} queries"
+        )
+
+    def last_run(self, output):
+        try:
+            with open(output) as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        return json.loads(lines[-1]) if lines else None
+
+    def compare(self, previous, run):
+        self.stdout.write(
+            f"Compared to {previous['revision']} {previous['label']} "
+            f"({previous['date']}):"
+        )
+        for name, result in run["results"].items():
+            before = previous["results"].get(name)
+            if before is None:
+                continue
+            change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+            self.stdout.write(
+                f"{name:>18}: p50 {change:+6.1f}% "
+                f"queries {before['queries']} -> {result['queries']}"
+            )
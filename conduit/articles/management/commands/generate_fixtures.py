@@ -0,0 +1,210 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import cache
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from conduit.articles.models import Article, ArticleTag, Comment
+from conduit.articles.tags import get_or_create_tags
+from conduit.users.models import Profile
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud "
+    "exercitation ullamco laboris nisi aliquip ex ea commodo consequat duis aute "
+    "irure in reprehenderit voluptate velit esse cillum fugiat nulla pariatur"
+).split()
+
+
+@cache
+def _rank_weights(size):
+    """Cumulative weights of a Zipf distribution over `size` ranks"""
+    return list(accumulate(1 / rank for rank in range(1, size + 1)))
+
+
+@contextmanager
+def _explicit_dates(*models):
+    """Let bulk_create() keep the `created_at` set on objects of `models`"""
+    fields = {
+        field: field.auto_now_add
+        for field in (model._meta.get_field("created_at") for model in models)
+    }
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now_add in fields.items():
+            field.auto_now_add = auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate users, follows, articles, comments and favorites in bulk, "
+        "for load tests and benchmarks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--follows", type=int, default=20, help="Profiles followed per user"
+        )
+        parser.add_argument(
+            "--articles", type=int, default=5, help="Articles written per user"
+        )
+        parser.add_argument(
+            "--comments", type=int, default=5, help="Average comments per article"
+        )
+        parser.add_argument(
+            "--favorites", type=int, default=20, help="Articles favorited per user"
+        )
+        parser.add_argument("--tags", type=int, default=50, help="Size of the tag pool")
+        parser.add_argument(
+            "--days", type=int, default=365, help="Articles are spread over this period"
+        )
+        parser.add_argument("--prefix", default="user", help="Prefix of the usernames")
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+
+        # bulk_create() sends no signals: profiles, counters, the search index
+        # and timelines are all taken care of here
+        with transaction.atomic(), _explicit_dates(Article, Comment):
+            profile_ids = self.create_users(
+                options["users"], options["prefix"], options["password"]
+            )
+            self.create_follows(profile_ids, options["follows"])
+            articles = self.create_articles(
+                profile_ids, options["articles"], options["tags"], options["days"]
+            )
+            self.create_comments(articles, profile_ids, options["comments"])
+            self.create_favorites(articles, profile_ids, options["favorites"])
+
+        call_command("reconcile_counters", stdout=self.stdout)
+        call_command("rebuild_search_index", stdout=self.stdout)
+        if settings.TIMELINE_ENABLED:
+            call_command("rebuild_timelines", stdout=self.stdout)
+
+    def skewed_sample(self, population, k):
+        """
+        Up to `k` distinct items of `population`, the first ones being much
+        more likely (a few popular authors and articles, many unknown ones)
+        """
+        if not population:
+            return set()
+        return set(
+            self.rng.choices(
+                population, cum_weights=_rank_weights(len(population)), k=k
+            )
+        )
+
+    def words(self, count):
+        return " ".join(self.rng.choice(WORDS) for _ in range(count))
+
+    def create_users(self, count, prefix, password):
+        User = get_user_model()
+        # hashing once: hashers are slow by design
+        password = make_password(password)
+        first = User.objects.filter(username__startswith=prefix).count()
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"{prefix}{i}",
+                    email=f"{prefix}{i}@example.com",
+                    password=password,
+                )
+                for i in range(first, first + count)
+            ],
+            batch_size=self.batch_size,
+        )
+        profiles = Profile.objects.bulk_create(
+            [Profile(user=user, bio=self.words(12)) for user in users],
+            batch_size=self.batch_size,
+        )
+        self.stdout.write(f"Created {len(profiles)} users.")
+        return [profile.pk for profile in profiles]
+
+    def create_follows(self, profile_ids, per_user):
+        Follow = Profile.follows.through
+        popular = self.rng.sample(profile_ids, len(profile_ids))
+        follows = [
+            Follow(from_profile_id=follower, to_profile_id=followed)
+            for follower in profile_ids
+            for followed in self.skewed_sample(popular, per_user)
+            if followed != follower
+        ]
+        Follow.objects.bulk_create(follows, batch_size=self.batch_size)
+        self.stdout.write(f"Created {len(follows)} follows.")
+
+    def create_articles(self, profile_ids, per_user, tag_count, days):
+        tags = get_or_create_tags([f"tag{i}" for i in range(tag_count)])
+        articles = []
+        for author_id in profile_ids:
+            for _ in range(per_user):
+                title = self.words(6).capitalize()
+                article = Article(
+                    title=title,
+                    slug=slugify(title),
+                    description=self.words(15).capitalize(),
+                    body="\n\n".join(self.words(60) for _ in range(4)),
+                    author_id=author_id,
+                    created_at=self.now
+                    - timedelta(seconds=self.rng.uniform(0, days * 24 * 60 * 60)),
+                )
+                article._refresh_body_html()
+                articles.append(article)
+        articles = Article.objects.bulk_create(articles, batch_size=self.batch_size)
+
+        taggings = [
+            ArticleTag(article=article, tag=tag, created_at=article.created_at)
+            for article in articles
+            for tag in self.skewed_sample(tags, self.rng.randint(0, 3))
+        ]
+        ArticleTag.objects.bulk_create(taggings, batch_size=self.batch_size)
+        self.stdout.write(
+            f"Created {len(articles)} articles, {len(taggings)} taggings."
+        )
+        return articles
+
+    def create_comments(self, articles, profile_ids, average):
+        comments = []
+        for article in articles:
+            age = (self.now - article.created_at).total_seconds()
+            for _ in range(self.rng.randint(0, 2 * average)):
+                comments.append(
+                    Comment(
+                        article=article,
+                        author_id=self.rng.choice(profile_ids),
+                        body=self.words(20).capitalize(),
+                        created_at=article.created_at
+                        + timedelta(seconds=self.rng.uniform(0, age)),
+                    )
+                )
+        Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+        self.stdout.write(f"Created {len(comments)} comments.")
+
+    def create_favorites(self, articles, profile_ids, per_user):
+        Favorite = Profile.favorites.through
+        popular = [article.pk for article in articles]
+        self.rng.shuffle(popular)
+        favorites = [
+            Favorite(profile_id=profile_id, article_id=article_id)
+            for profile_id in profile_ids
+            for article_id in self.skewed_sample(popular, per_user)
+        ]
+        Favorite.objects.bulk_create(favorites, batch_size=self.batch_size)
+        self.stdout.write(f"Created {len(favorites)} favorites.")
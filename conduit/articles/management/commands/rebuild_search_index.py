@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from conduit.articles.models import Article
+from conduit.articles.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of the articles"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of articles indexed per transaction (default: 500)",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        backend = get_backend()
+        backend.clear()
+
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Article.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", "title", "description", "body")[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            with transaction.atomic():
+                backend.index(batch)
+            indexed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} article(s)."))
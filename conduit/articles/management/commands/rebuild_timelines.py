@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from conduit.articles import timeline
+from conduit.users.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized follow feeds, e.g. after enabling them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "usernames",
+            nargs="*",
+            help="Only rebuild the timelines of these users (default: everyone)",
+        )
+
+    def handle(self, *args, usernames, **options):
+        profiles = Profile.objects.order_by("pk")
+        if usernames:
+            profiles = profiles.filter(user__username__in=usernames)
+
+        rebuilt = 0
+        for profile in profiles.iterator():
+            timeline.rebuild(profile)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} timeline(s)."))
@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from conduit.articles.models import Article, ArticleTag, Comment, Tag
+from conduit.users.models import Profile
+
+
+def _count(queryset, field="article_id"):
+    """Correlated subquery counting the rows of `queryset` for the outer row"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("pk")})
+            .values(field)
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Article.favorites_count, Article.comments_count, "
+        "Profile.followers_count and Tag.articles_count where they drifted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of articles checked per transaction (default: 1000)",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        favorites = _count(Profile.favorites.through.objects.all())
+        comments = _count(Comment.objects.all())
+
+        fixed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Article.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+
+            with transaction.atomic():
+                drifted = (
+                    Article.objects.filter(pk__in=batch)
+                    .annotate(real_favorites=favorites, real_comments=comments)
+                    .exclude(
+                        favorites_count=F("real_favorites"),
+                        comments_count=F("real_comments"),
+                    )
+                    .values_list("pk", flat=True)
+                )
+                # recompute inside the UPDATE so that concurrent F() updates
+                # committed in the meantime aren't overwritten
+                fixed += Article.objects.filter(pk__in=list(drifted)).update(
+                    favorites_count=favorites, comments_count=comments
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} article(s)."))
+
+        followers = _count(Profile.follows.through.objects.all(), "to_profile_id")
+        with transaction.atomic():
+            drifted = (
+                Profile.objects.annotate(real_followers=followers)
+                .exclude(followers_count=F("real_followers"))
+                .values_list("pk", flat=True)
+            )
+            fixed = Profile.objects.filter(pk__in=list(drifted)).update(
+                followers_count=followers
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} profile(s)."))
+
+        articles = _count(ArticleTag.objects.all(), "tag_id")
+        with transaction.atomic():
+            drifted = (
+                Tag.objects.annotate(real_articles=articles)
+                .exclude(articles_count=F("real_articles"))
+                .values_list("pk", flat=True)
+            )
+            fixed = Tag.objects.filter(pk__in=list(drifted)).update(
+                articles_count=articles
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} tag(s)."))
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Article = apps.get_model("articles", "Article")
+    Comment = apps.get_model("articles", "Comment")
+    Profile = apps.get_model("users", "Profile")
+
+    favorites = (
+        Profile.favorites.through.objects.filter(article_id=OuterRef("pk"))
+        .values("article_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    comments = (
+        Comment.objects.filter(article_id=OuterRef("pk"))
+        .values("article_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    Article.objects.update(
+        favorites_count=Coalesce(Subquery(favorites), 0),
+        comments_count=Coalesce(Subquery(comments), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_article_feed_indexes'),
+        ('users', '0007_profile_favorites'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
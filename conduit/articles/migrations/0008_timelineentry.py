@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0007_article_counters'),
+        ('users', '0008_profile_followers_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='articles.article')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.profile')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to='users.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', '-created_at', '-article'], name='timeline_feed_idx'), models.Index(fields=['owner', 'author'], name='timeline_author_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'article'), name='unique_timeline_entry')],
+            },
+        ),
+    ]
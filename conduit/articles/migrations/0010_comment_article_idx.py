@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0009_article_body_html'),
+        ('users', '0008_profile_followers_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', '-created_at', '-id'], name='comment_article_idx'),
+        ),
+    ]
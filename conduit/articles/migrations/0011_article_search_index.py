@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:35
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # used by conduit.articles.search.SQLiteFTS5Backend
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS articles_article_fts "
+        "USING fts5(title, description, body, tokenize='porter unicode61')"
+    )
+    schema_editor.execute(
+        "INSERT INTO articles_article_fts (rowid, title, description, body) "
+        "SELECT id, title, description, body FROM articles_article"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS articles_article_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0010_comment_article_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:20
+
+from django.db import migrations
+
+INDEX_NAME = "article_search_idx"
+
+
+def _index():
+    from django.contrib.postgres.indexes import GinIndex
+
+    from conduit.articles.search import PostgresSearchBackend
+
+    # the expression searches filter on, for them to be index scans
+    return GinIndex(PostgresSearchBackend.document(), name=INDEX_NAME)
+
+
+def create_search_index(apps, schema_editor):
+    # used by conduit.articles.search.PostgresSearchBackend
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.add_index(apps.get_model("articles", "Article"), _index())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.remove_index(apps.get_model("articles", "Article"), _index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0013_article_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
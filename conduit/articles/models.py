@@ -1,9 +1,12 @@
 from django.db import models
 from django.shortcuts import reverse
 
+from django.utils.safestring import mark_safe
 from django.utils.text import slugify
 import uuid
 
+from .rendering import body_hash, render_body
+
 
 class Article(models.Model):
     """Article model."""
@@ -15,12 +18,36 @@ class Article(models.Model):
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     description = models.TextField(max_length=2000)
     body = models.TextField()
+    # `body` rendered to HTML, computed when it changes (see rendered_body)
+    body_html = models.TextField(blank=True, editable=False)
+    body_hash = models.CharField(max_length=64, blank=True, editable=False)
     author = models.ForeignKey(
         "users.Profile",
         on_delete=models.CASCADE,
         related_name="articles",
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # changed by every save, and by the receivers updating its counters or tags
+    updated_at = models.DateTimeField(auto_now=True)
+    tags = models.ManyToManyField(
+        "Tag", through="ArticleTag", related_name="articles", blank=True
+    )
+    # denormalized counters: they are only ever changed with F() expressions by
+    # the receivers in conduit.articles.signals, never written back by save()
+    favorites_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ("favorites_count", "comments_count")
+
+    class Meta:
+        # feeds are paginated on (created_at, id), newest first: these indexes let
+        # every page be an index range scan, globally and for a single author
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="article_feed_idx"),
+            models.Index(
+                fields=["author", "-created_at", "-id"], name="article_author_feed_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -28,9 +55,51 @@ class Article(models.Model):
     def get_absolute_url(self):
         return reverse("article_detail", kwargs={"slug": self.slug, "uuid": self.uuid})
 
+    @property
+    def rendered_body(self):
+        """
+        HTML of the body, rendered on save.
+
+        Rows saved before the body was pre-rendered, or with another
+        ARTICLE_BODY_RENDERER, are rendered on their first read and stored.
+        """
+
+        if self._refresh_body_html() and self.pk:
+            Article.objects.filter(pk=self.pk).update(
+                body_html=self.body_html, body_hash=self.body_hash
+            )
+        return mark_safe(self.body_html)
+
+    def _refresh_body_html(self):
+        """Render the body again if it changed: return True if it did"""
+        current_hash = body_hash(self.body)
+        if current_hash == self.body_hash:
+            return False
+        self.body_html = render_body(self.body)
+        self.body_hash = current_hash
+        return True
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        update_fields = kwargs.get("update_fields")
+        deferred = self.get_deferred_fields()
+        body_changed = update_fields is None or "body" in update_fields
+        if body_changed and "body" not in deferred:
+            self._refresh_body_html()
+            if update_fields is not None:
+                update_fields = {*update_fields, "body_html", "body_hash"}
+        if update_fields:
+            kwargs["update_fields"] = {*update_fields, "updated_at"}
+        if not self._state.adding and update_fields is None:
+            # the counters loaded with this instance may be stale by now
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
         super().save(*args, **kwargs)
 
 
@@ -44,6 +113,14 @@ class Comment(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # comments are paginated per article on (created_at, id), newest first
+        indexes = [
+            models.Index(
+                fields=["article", "-created_at", "-id"], name="comment_article_idx"
+            ),
+        ]
+
     def __str__(self):
         return self.body[:60] + "..."
 
@@ -52,3 +129,87 @@ class Comment(models.Model):
             "article_detail",
             kwargs={"slug": self.article.slug, "uuid": self.article.uuid},
         )
+
+
+class Tag(models.Model):
+    """Tag of articles, identified by the slug of its name"""
+
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    # denormalized counter kept up to date by conduit.articles.signals
+    articles_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        # the "Popular Tags" sidebar reads the top of this index
+        indexes = [
+            models.Index(fields=["-articles_count", "name"], name="tag_popular_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slugify(self.name)
+        super().save(*args, **kwargs)
+
+
+class ArticleTag(models.Model):
+    """Tagging of an article, with a copy of its date to page tag feeds by it"""
+
+    article = models.ForeignKey(Article, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["article", "tag"], name="unique_article_tag"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["tag", "-created_at", "-article"], name="tag_feed_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.article} #{self.tag}"
+
+
+class TimelineEntry(models.Model):
+    """
+    An article in the follow feed of `owner`.
+
+    Entries are written when an article is published ("fan-out on write", see
+    conduit.articles.timeline), so reading a follow feed is a range scan of
+    the owner's entries instead of a join across the follow graph.
+    """
+
+    owner = models.ForeignKey(
+        "users.Profile", on_delete=models.CASCADE, related_name="timeline"
+    )
+    article = models.ForeignKey(
+        Article, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    # copies of the article's fields, to scan and prune without joining it
+    author = models.ForeignKey(
+        "users.Profile", on_delete=models.CASCADE, related_name="+"
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "article"], name="unique_timeline_entry"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["owner", "-created_at", "-article"], name="timeline_feed_idx"
+            ),
+            models.Index(fields=["owner", "author"], name="timeline_author_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.article} in {self.owner}'s timeline"
@@ -0,0 +1,177 @@
+"""
+Full-page cache for anonymous users.
+
+Logged out readers all get the same HTML: views declare a page cacheable
+with `depends_on(request, *keys)`, naming the versions (see
+conduit.articles.fragments) of what the page shows. `PageCacheMiddleware`
+stores these responses in the PAGE_CACHE_ALIAS cache, and answers the next
+anonymous requests to the same URL from it, before the session and
+authentication middleware, so without any database query.
+
+A page is stale when one of its versions was dropped (the receivers in
+conduit.articles.signals do it on article, comment and favorite writes) or
+after PAGE_CACHE_TIMEOUT. Only one request re-renders a stale page, the
+others keep getting the stale copy meanwhile; when there's no copy at all,
+they wait up to PAGE_CACHE_LOCK_WAIT seconds for the first one to render it.
+This only applies to the URLs a page was stored for: the others (API, search,
+redirects, errors...) may not be cacheable at all, and are rendered
+concurrently.
+
+Requests are anonymous when they carry no session cookie. Responses setting
+cookies are never stored: they are specific to their client.
+"""
+
+import hashlib
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+
+from . import fragments
+
+FEED_PAGES = ("feed-pages", 0)
+
+# how often requests waiting for another one to render a page check for it
+_POLL_INTERVAL = 0.05
+# how long a URL is known to be cacheable, outliving the copies of its page
+_MARKER_TIMEOUT = 60 * 60 * 24
+
+
+def article_page(article_id):
+    return ("article-page", article_id)
+
+
+def depends_on(request, *keys):
+    """
+    Let the page answered to `request` be cached for anonymous users, until
+    one of the versions of `keys` is dropped.
+
+    The versions are read when it's called: call it before rendering, so that
+    a change made meanwhile makes the page stale.
+    """
+
+    if request.user.is_authenticated:
+        return
+    request._page_cache_versions = fragments.get_versions(keys)
+
+
+def _cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def _marker_key(key):
+    # set for the URLs of cacheable pages, to coordinate their renders
+    return f"{key}:cacheable"
+
+
+def _page_key(request):
+    url = request.build_absolute_uri()
+    htmx = "htmx" if request.headers.get("HX-Request") else "page"
+    return f"page:{htmx}:{hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()}"
+
+
+class PageCacheMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._is_cacheable(request):
+            return self.get_response(request)
+        key = _page_key(request)
+        response = self._cached_response(request, key)
+        if response is None:
+            try:
+                response = self._store(request, key, self.get_response(request))
+            finally:
+                self._unlock(request, key)
+        return response
+
+    async def __acall__(self, request):
+        if not self._is_cacheable(request):
+            return await self.get_response(request)
+        key = _page_key(request)
+        response = await sync_to_async(self._cached_response)(request, key)
+        if response is None:
+            try:
+                response = self._store(request, key, await self.get_response(request))
+            finally:
+                self._unlock(request, key)
+        return response
+
+    def _is_cacheable(self, request):
+        return (
+            request.method in ("GET", "HEAD")
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        )
+
+    def _cached_response(self, request, key):
+        """The cached response to `request`, or None if it must be rendered"""
+
+        cache = _cache()
+        deadline = time.monotonic() + settings.PAGE_CACHE_LOCK_WAIT
+        while True:
+            found = cache.get_many([key, _marker_key(key)])
+            entry = found.get(key)
+            if entry is not None and self._is_fresh(entry):
+                return self._serve(request, entry)
+            if entry is None and _marker_key(key) not in found:
+                return None
+            # whoever gets the lock renders the page
+            if cache.add(f"{key}:lock", 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+                request._page_cache_locked = True
+                return None
+            if entry is not None:
+                return self._serve(request, entry)
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(_POLL_INTERVAL)
+
+    def _is_fresh(self, entry):
+        return (
+            time.time() < entry["expires"]
+            and fragments.get_versions(entry["versions"]) == entry["versions"]
+        )
+
+    def _serve(self, request, entry):
+        response = entry["response"]
+        return get_conditional_response(
+            request, etag=response.get("ETag"), response=response
+        ) or response
+
+    def _store(self, request, key, response):
+        versions = getattr(request, "_page_cache_versions", None)
+        if (
+            versions is not None
+            and request.method == "GET"
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.user.is_authenticated
+        ):
+            _cache().set(
+                key,
+                {
+                    "response": response,
+                    "versions": versions,
+                    "expires": time.time() + settings.PAGE_CACHE_TIMEOUT,
+                },
+                settings.PAGE_CACHE_STALE_TIMEOUT,
+            )
+            _cache().set(_marker_key(key), True, _MARKER_TIMEOUT)
+        elif versions is None and getattr(request, "_page_cache_locked", False):
+            # the view stopped declaring the page cacheable
+            _cache().delete(_marker_key(key))
+        return response
+
+    def _unlock(self, request, key):
+        if getattr(request, "_page_cache_locked", False):
+            _cache().delete(f"{key}:lock")
@@ -0,0 +1,106 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousOperation
+from django.db.models import Q
+
+
+class InvalidCursor(SuspiciousOperation):
+    """Raised when a `cursor` query parameter can't be decoded (answered with a 400)"""
+
+
+class KeysetPage:
+    """A page of objects plus the cursor pointing at the next one"""
+
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def encode_cursor(created_at, pk):
+    """Encode the `(created_at, pk)` key of the last row of a page"""
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the `(created_at, pk)` tuple encoded by `encode_cursor`"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except ValueError:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+
+
+def _keyset_queryset(queryset, cursor, page_size, key):
+    time_field, id_field = key
+    queryset = queryset.order_by(f"-{time_field}", f"-{id_field}")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f"{time_field}__lt": created_at})
+            | Q(**{time_field: created_at, f"{id_field}__lt": pk})
+        )
+    # fetch one extra row to know whether there is a next page
+    return queryset[: page_size + 1]
+
+
+def _keyset_page(rows, page_size, key):
+    if len(rows) <= page_size:
+        return KeysetPage(rows)
+
+    time_field, id_field = key
+    rows = rows[:page_size]
+    last = rows[-1]
+    return KeysetPage(
+        rows, encode_cursor(getattr(last, time_field), getattr(last, id_field))
+    )
+
+
+def paginate(queryset, cursor=None, page_size=None, key=("created_at", "pk")):
+    """
+    Return the page of `queryset` that follows `cursor`, newest first.
+
+    Rows are ordered on the `key` fields (a timestamp and a unique tie-breaker)
+    and the next page starts strictly after the last row of this one, so the
+    database walks an index range instead of counting and skipping rows like
+    OFFSET does: the cost of a page doesn't depend on how deep it is.
+    """
+
+    page_size = page_size or settings.ARTICLES_PAGE_SIZE
+    rows = list(_keyset_queryset(queryset, cursor, page_size, key))
+    return _keyset_page(rows, page_size, key)
+
+
+async def apaginate(queryset, cursor=None, page_size=None, key=("created_at", "pk")):
+    """`paginate` for async views"""
+
+    page_size = page_size or settings.ARTICLES_PAGE_SIZE
+    queryset = _keyset_queryset(queryset, cursor, page_size, key)
+    rows = [row async for row in queryset.aiterator()]
+    return _keyset_page(rows, page_size, key)
+
+
+def paginate_request(request, queryset, **kwargs):
+    """`paginate` using the `cursor` GET parameter of `request`"""
+    return paginate(queryset, request.GET.get("cursor"), **kwargs)
+
+
+async def apaginate_request(request, queryset, **kwargs):
+    """`apaginate` using the `cursor` GET parameter of `request`"""
+    return await apaginate(queryset, request.GET.get("cursor"), **kwargs)
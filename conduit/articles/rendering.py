@@ -0,0 +1,80 @@
+"""
+Rendering of article bodies to HTML.
+
+Bodies are rendered once, when they change, and the HTML is stored on the
+article along with a hash of the body and of the renderer that produced it
+(see `Article.rendered_body`). `ARTICLE_BODY_RENDERER` picks the renderer:
+"linebreaks" (paragraphs, like the `linebreaks` template filter) or
+"markdown", which needs the `markdown` package.
+"""
+
+import hashlib
+import html
+import re
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.html import linebreaks
+
+# part of the body hashes: bump it when the HTML produced changes, to have the
+# stored bodies rendered again (2: character references in URLs checked)
+RENDERING_VERSION = 2
+SAFE_URL_SCHEMES = {"", "http", "https", "mailto"}
+# browsers ignore these in URLs: "java\tscript:" is a "javascript:" URL
+_IGNORED_URL_CHARACTERS_RE = re.compile(r"[\x00-\x20\x7f]")
+
+
+def body_hash(body, renderer=None):
+    """Hash identifying the HTML rendered from `body` by `renderer`"""
+    renderer = renderer or settings.ARTICLE_BODY_RENDERER
+    key = f"{renderer}\0{RENDERING_VERSION}\0{body}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def render_body(body, renderer=None):
+    """Return the HTML rendered from `body` by `renderer`"""
+
+    renderer = renderer or settings.ARTICLE_BODY_RENDERER
+    if renderer == "linebreaks":
+        return linebreaks(body, autoescape=True)
+    if renderer == "markdown":
+        return _render_markdown(body)
+    raise ImproperlyConfigured(f"Unknown ARTICLE_BODY_RENDERER: {renderer!r}")
+
+
+def _render_markdown(body):
+    try:
+        import markdown
+        from markdown.treeprocessors import Treeprocessor
+    except ImportError as exc:
+        raise ImproperlyConfigured(
+            "ARTICLE_BODY_RENDERER = 'markdown' requires the markdown package."
+        ) from exc
+
+    class DropUnsafeUrls(Treeprocessor):
+        """Remove links and images pointing to e.g. `javascript:` URLs"""
+
+        def run(self, root):
+            for element in root.iter():
+                for attribute in ("href", "src"):
+                    url = element.get(attribute)
+                    if url is not None and not _is_safe_url(url):
+                        del element.attrib[attribute]
+
+    md = markdown.Markdown(extensions=["fenced_code", "tables"])
+    # raw HTML in bodies is escaped instead of being passed through
+    md.preprocessors.deregister("html_block")
+    md.inlinePatterns.deregister("html")
+    md.treeprocessors.register(DropUnsafeUrls(md), "drop_unsafe_urls", 0)
+    return md.convert(body)
+
+
+def _is_safe_url(url):
+    # attributes are serialized as they are, with their character references
+    url = _IGNORED_URL_CHARACTERS_RE.sub("", html.unescape(url))
+    try:
+        scheme = urlsplit(url).scheme
+    except ValueError:
+        return False
+    return scheme.lower() in SAFE_URL_SCHEMES
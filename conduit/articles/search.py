@@ -0,0 +1,157 @@
+"""
+Full-text search over articles.
+
+The backend is chosen by `ARTICLE_SEARCH_BACKEND`. Backends keep their index
+up to date through `index()`/`remove()`, called by the receivers in
+conduit.articles.signals, and answer `search()` with article ids, best match
+first. `rebuild_search_index` rebuilds an index from scratch.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+
+from .models import Article
+
+WORD_RE = re.compile(r"\w+")
+
+
+def get_backend():
+    """Return an instance of the configured search backend"""
+    return import_string(settings.ARTICLE_SEARCH_BACKEND)()
+
+
+class SearchBackend:
+    """Base class of search backends"""
+
+    def index(self, articles):
+        """Add `articles` to the index, or update them"""
+
+    def remove(self, article_ids):
+        """Remove the articles with `article_ids` from the index"""
+
+    def clear(self):
+        """Empty the index"""
+
+    def search(self, query, offset=0, limit=20):
+        """Return the ids of the articles matching `query`, best match first"""
+        raise NotImplementedError
+
+
+class BasicSearchBackend(SearchBackend):
+    """Unindexed substring search, newest articles first: works everywhere"""
+
+    def search(self, query, offset=0, limit=20):
+        articles = Article.objects.all()
+        for word in WORD_RE.findall(query):
+            articles = articles.filter(
+                Q(title__icontains=word)
+                | Q(description__icontains=word)
+                | Q(body__icontains=word)
+            )
+        return list(
+            articles.order_by("-created_at", "-pk").values_list("pk", flat=True)[
+                offset : offset + limit
+            ]
+        )
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    SQLite FTS5 index, ranked with bm25.
+
+    The `articles_article_fts` virtual table is created by the articles
+    migrations; its rowids are the ids of the articles.
+    """
+
+    table = "articles_article_fts"
+    # bm25 weights of the title, description and body columns
+    weights = (10.0, 5.0, 1.0)
+
+    def _cursor(self):
+        return connections[router.db_for_write(Article)].cursor()
+
+    def index(self, articles):
+        rows = [
+            (article.pk, article.title, article.description, article.body)
+            for article in articles
+        ]
+        if not rows:
+            return
+        with self._cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [(row[0],) for row in rows],
+            )
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, title, description, body) "
+                "VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, article_ids):
+        with self._cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [(pk,) for pk in article_ids],
+            )
+
+    def clear(self):
+        with self._cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def search(self, query, offset=0, limit=20):
+        # every word must match, as a prefix so that results show up while
+        # typing; quoting keeps FTS5 operators in the input from being parsed
+        words = WORD_RE.findall(query)
+        if not words:
+            return []
+        match = " ".join(f'"{word}"*' for word in words)
+
+        connection = connections[router.db_for_read(Article)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, %s, %s, %s) LIMIT %s OFFSET %s",
+                [match, *self.weights, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    PostgreSQL full-text search, ranked with ts_rank.
+
+    The articles migrations add a GIN index on `document()` (on PostgreSQL
+    only): searches match it with @@ and only rank the matching articles.
+    """
+
+    # an explicit configuration makes to_tsvector() immutable, as indexes need
+    config = "english"
+
+    @classmethod
+    def document(cls):
+        """The weighted search vector of an article, as it is indexed"""
+
+        from django.contrib.postgres.search import SearchVector
+
+        return (
+            SearchVector("title", weight="A", config=cls.config)
+            + SearchVector("description", weight="B", config=cls.config)
+            + SearchVector("body", weight="C", config=cls.config)
+        )
+
+    def search(self, query, offset=0, limit=20):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(query, search_type="websearch", config=self.config)
+        return list(
+            Article.objects.annotate(document=self.document())
+            .filter(document=search_query)
+            .annotate(rank=SearchRank(F("document"), search_query))
+            .order_by("-rank", "-pk")
+            .values_list("pk", flat=True)[offset : offset + limit]
+        )
@@ -0,0 +1,306 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from conduit.users.models import Profile
+
+from . import fragments, pagecache, tasks, timeline
+from .models import Article, ArticleTag, Comment, Tag
+
+
+def _update_counter(queryset, field, value):
+    changes = {field: value}
+    # a counter change is a change of the row for conditional GETs
+    try:
+        queryset.model._meta.get_field("updated_at")
+    except FieldDoesNotExist:
+        pass
+    else:
+        changes["updated_at"] = timezone.now()
+    queryset.update(**changes)
+
+
+def increment(queryset, field, step=1):
+    """Atomically add `step` to the counter `field` of every row of `queryset`"""
+    _update_counter(queryset, field, F(field) + step)
+
+
+def decrement(queryset, field, step=1):
+    """Atomically subtract `step` from the counter `field`, never going below 0"""
+    _update_counter(queryset, field, Greatest(F(field) - step, 0))
+
+
+def update_m2m_count(
+    sender, instance, action, reverse, pk_set, fields, counter, **kwargs
+):
+    """
+    Keep a counter of the target model of a many-to-many relation in sync.
+
+    `sender` is the table of the relation, `fields` the names of its columns
+    pointing to the source and to the target model, and `counter` the field of
+    the target model counting its rows, as in `(Tag, "articles_count")`.
+    """
+
+    source_field, target_field = fields
+    model, field = counter
+    # with `reverse`, `instance` is the target and `pk_set` holds sources
+    own_field, other_field = (target_field, source_field) if reverse else fields
+
+    removed_key = f"_removed_{sender._meta.db_table}"
+
+    if action in ("pre_remove", "pre_clear"):
+        # remove() accepts objects that aren't related and clear() doesn't
+        # say what it deletes: remember which rows really go away
+        rows = sender.objects.filter(**{own_field: instance.pk})
+        if pk_set is not None:
+            rows = rows.filter(**{f"{other_field}__in": pk_set})
+        instance.__dict__[removed_key] = set(rows.values_list(other_field, flat=True))
+        return
+
+    if action == "post_add":
+        changed, update = pk_set, increment
+    elif action in ("post_remove", "post_clear"):
+        changed, update = instance.__dict__.pop(removed_key, pk_set), decrement
+    else:
+        return
+
+    if not changed:
+        return
+    if reverse:
+        update(model.objects.filter(pk=instance.pk), field, len(changed))
+    else:
+        update(model.objects.filter(pk__in=changed), field)
+
+
+@receiver(m2m_changed, sender=Profile.favorites.through)
+def update_favorites_count(sender, **kwargs):
+    """Keep `Article.favorites_count` in sync with `Profile.favorites`"""
+    update_m2m_count(
+        sender,
+        fields=("profile_id", "article_id"),
+        counter=(Article, "favorites_count"),
+        **kwargs,
+    )
+
+
+@receiver(m2m_changed, sender=ArticleTag)
+def update_articles_count(sender, **kwargs):
+    """Keep `Tag.articles_count` in sync with `Article.tags`"""
+    update_m2m_count(
+        sender,
+        fields=("article_id", "tag_id"),
+        counter=(Tag, "articles_count"),
+        **kwargs,
+    )
+
+
+@receiver(pre_delete, sender=Article)
+def decrement_articles_count(sender, instance, **kwargs):
+    # the tagging rows of the article are deleted without m2m_changed
+    decrement(Tag.objects.filter(articletag__article=instance), "articles_count")
+
+
+@receiver(m2m_changed, sender=ArticleTag)
+def invalidate_tagged_previews(sender, instance, action, reverse, pk_set, **kwargs):
+    # previews and article pages show the tags of the article
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    article_ids = (pk_set or ()) if reverse else [instance.pk]
+    Article.objects.filter(pk__in=article_ids).update(updated_at=timezone.now())
+    for article_id in article_ids:
+        fragments.invalidate("article", article_id)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        increment(Article.objects.filter(pk=instance.article_id), "comments_count")
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    decrement(Article.objects.filter(pk=instance.article_id), "comments_count")
+
+
+@receiver(post_save, sender=Article)
+def fan_out_article(sender, instance, created, **kwargs):
+    if created and settings.TIMELINE_ENABLED:
+        tasks.fan_out.enqueue(instance.pk, key=f"fan-out:{instance.pk}")
+
+
+# columns of the follows pointing to the follower and to the followed profile
+FOLLOW_FIELDS = ("from_profile_id", "to_profile_id")
+
+
+def _no_longer_popular(follows, lost):
+    """
+    Ids of the authors of `lost`, mapping them to the number of followers they
+    just lost, who went from above TIMELINE_FANOUT_MAX_FOLLOWERS to within it.
+    """
+
+    limit = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    for author_id, count in lost.items():
+        if not count:
+            continue
+        # counted from the rows: `followers_count` may not be updated yet
+        rows = follows.objects.filter(to_profile_id=author_id)[: limit + 1]
+        remaining = rows.count()
+        if remaining <= limit < remaining + count:
+            yield author_id
+
+
+@receiver(m2m_changed, sender=Profile.follows.through)
+def update_timelines(sender, instance, action, reverse, pk_set, **kwargs):
+    """Backfill or prune timelines when profiles follow or unfollow each other"""
+
+    if not settings.TIMELINE_ENABLED:
+        return
+
+    # with `reverse`, `instance` is the followed profile and `pk_set` its followers
+    removed_key = "_unfollowed_profiles"
+    if action in ("pre_remove", "pre_clear"):
+        # remove() accepts profiles that aren't followed and clear() doesn't
+        # say what it deletes: remember which rows really go away. Toggles
+        # only send post_remove, once their row is deleted.
+        own_field, other_field = FOLLOW_FIELDS[::-1] if reverse else FOLLOW_FIELDS
+        rows = sender.objects.filter(**{own_field: instance.pk})
+        if pk_set is not None:
+            rows = rows.filter(**{f"{other_field}__in": pk_set})
+        instance.__dict__[removed_key] = set(rows.values_list(other_field, flat=True))
+    elif action == "post_add":
+        if reverse:
+            follows = [(owner_id, instance.pk) for owner_id in pk_set]
+        else:
+            follows = [(instance.pk, author_id) for author_id in pk_set]
+        # copying articles is slow, removing them is not: only backfills wait
+        for owner_id, author_id in follows:
+            tasks.backfill_timelines.enqueue(
+                [owner_id, author_id], key=f"backfill:{owner_id}:{author_id}"
+            )
+    if action in ("post_remove", "post_clear"):
+        removed = instance.__dict__.pop(removed_key, pk_set)
+        lost = {instance.pk: len(removed)} if reverse else dict.fromkeys(removed, 1)
+        # feeds merge in the articles of popular authors, which aren't fanned
+        # out: those falling under the limit need their articles copied
+        for author_id in _no_longer_popular(sender, lost):
+            tasks.backfill_followers.enqueue(
+                author_id, key=f"backfill-followers:{author_id}"
+            )
+
+    if action == "post_remove":
+        if reverse:
+            timeline.prune(owner_ids=pk_set, author_ids=[instance.pk])
+        else:
+            timeline.prune(owner_ids=[instance.pk], author_ids=pk_set)
+    elif action == "post_clear":
+        if reverse:
+            timeline.prune(author_ids=[instance.pk])
+        else:
+            timeline.prune(owner_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Article)
+def invalidate_article_preview(sender, instance, **kwargs):
+    fragments.invalidate("article", instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_author_previews(sender, instance, **kwargs):
+    # previews show the profile image and the username of the user, and
+    # conduit.users.backends caches them (a deleted user must be logged out)
+    user_id = instance.user_id if sender is Profile else instance.pk
+    fragments.invalidate("author", user_id)
+
+
+# columns of the relations of the viewer state: to the viewer, to the other side
+VIEWER_RELATIONS = {
+    Profile.favorites.through: ("profile_id", "article_id"),
+    Profile.follows.through: FOLLOW_FIELDS,
+}
+
+
+@receiver(m2m_changed, sender=Profile.favorites.through)
+@receiver(m2m_changed, sender=Profile.follows.through)
+def invalidate_viewer_state(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop the viewer version of the profiles whose favorites or follows change"""
+
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            fragments.invalidate("viewer", instance.pk)
+        return
+
+    # with `reverse`, `pk_set` holds the profiles: unknown for clear()
+    if action in ("post_add", "post_remove"):
+        profile_ids = pk_set
+    elif action == "pre_clear":
+        profile_field, other_field = VIEWER_RELATIONS[sender]
+        profile_ids = sender.objects.filter(**{other_field: instance.pk}).values_list(
+            profile_field, flat=True
+        )
+    else:
+        return
+    for profile_id in profile_ids:
+        fragments.invalidate("viewer", profile_id)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_article_pages(sender, instance, **kwargs):
+    fragments.invalidate(*pagecache.FEED_PAGES)
+    fragments.invalidate(*pagecache.article_page(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_page(sender, instance, **kwargs):
+    fragments.invalidate(*pagecache.article_page(instance.article_id))
+
+
+# column of the relations shown on article pages pointing away from articles
+ARTICLE_RELATIONS = {
+    Profile.favorites.through: "profile_id",
+    ArticleTag: "tag_id",
+}
+
+
+@receiver(m2m_changed, sender=Profile.favorites.through)
+@receiver(m2m_changed, sender=ArticleTag)
+def invalidate_related_pages(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop the cached pages showing favorite counts or tags that change"""
+
+    if isinstance(instance, Article):
+        if action not in ("post_add", "post_remove", "post_clear"):
+            return
+        article_ids = [instance.pk]
+    elif action in ("post_add", "post_remove"):
+        article_ids = pk_set
+    elif action == "pre_clear":
+        # clear() doesn't say which articles it removes
+        article_ids = sender.objects.filter(
+            **{ARTICLE_RELATIONS[sender]: instance.pk}
+        ).values_list("article_id", flat=True)
+    else:
+        return
+
+    fragments.invalidate(*pagecache.FEED_PAGES)
+    for article_id in article_ids:
+        fragments.invalidate(*pagecache.article_page(article_id))
+
+
+@receiver(post_save, sender=Article)
+def index_article(sender, instance, update_fields, **kwargs):
+    if update_fields and not {"title", "description", "body"} & set(update_fields):
+        return
+    tasks.reindex_articles.enqueue(instance.pk, key=f"reindex:{instance.pk}")
+
+
+@receiver(post_delete, sender=Article)
+def unindex_article(sender, instance, **kwargs):
+    tasks.reindex_articles.enqueue(instance.pk, key=f"reindex:{instance.pk}")
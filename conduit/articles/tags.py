@@ -0,0 +1,51 @@
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.text import slugify
+
+from .models import Tag
+
+POPULAR_TAGS_CACHE_KEY = "popular-tags"
+
+
+def parse_tags(text):
+    """Return the distinct tag names in `text`, separated by commas or spaces"""
+
+    max_length = Tag._meta.get_field("name").max_length
+    names = {}
+    for name in re.split(r"[,\s]+", text.lower()):
+        slug = slugify(name)
+        if slug:
+            names.setdefault(slug, name[:max_length])
+    return list(names.values())
+
+
+def get_or_create_tags(names):
+    """Return the tags named `names`, creating the missing ones in one query"""
+
+    slugs = {slugify(name): name for name in names}
+    Tag.objects.bulk_create(
+        [Tag(name=name, slug=slug) for slug, name in slugs.items()],
+        ignore_conflicts=True,
+    )
+    return list(Tag.objects.filter(slug__in=slugs))
+
+
+def popular_tags():
+    """
+    The most used tags, for the sidebar.
+
+    They are read from the top of the `Tag.articles_count` index, which is
+    maintained as articles are tagged, and cached for
+    POPULAR_TAGS_CACHE_TIMEOUT seconds: page views never aggregate taggings.
+    """
+
+    return cache.get_or_set(
+        POPULAR_TAGS_CACHE_KEY,
+        lambda: list(
+            Tag.objects.filter(articles_count__gt=0)
+            .order_by("-articles_count", "name")[: settings.POPULAR_TAGS_COUNT]
+        ),
+        timeout=settings.POPULAR_TAGS_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,37 @@
+"""Background jobs of the articles, queued by conduit.articles.signals"""
+
+from conduit.jobs.queue import task
+
+from . import search, timeline
+from .models import Article
+
+
+@task()
+def fan_out(article_id):
+    timeline.fan_out(article_id)
+
+
+@task(batch=True)
+def backfill_timelines(follows):
+    """Backfill timelines after follows, `[owner_id, author_id]` pairs"""
+    timeline.backfill_follows(follows)
+
+
+@task(batch=True)
+def backfill_followers(author_ids):
+    """Fan out the articles of authors who may have stopped being too popular"""
+    timeline.backfill_followers(set(author_ids))
+
+
+@task(batch=True)
+def reindex_articles(article_ids):
+    """Index the articles in `article_ids`, or remove the deleted ones"""
+
+    backend = search.get_backend()
+    articles = list(
+        Article.objects.filter(pk__in=article_ids).only(
+            "pk", "title", "description", "body"
+        )
+    )
+    backend.index(articles)
+    backend.remove(set(article_ids) - {article.pk for article in articles})
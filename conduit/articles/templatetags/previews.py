@@ -0,0 +1,11 @@
+from django import template
+
+from conduit.articles.fragments import render_previews
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def article_previews(context, articles):
+    """Render the previews of `articles` (see conduit.articles.fragments)"""
+    return render_previews(context, articles)
@@ -1,3 +1,890 @@
-from django.test import TestCase
+import base64
+import copy
+import io
+import importlib.util
+import tempfile
+import threading
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connections
+from django.db.utils import load_backend
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import timezone
+
+from config.instrumentation import QueryBudgetExceeded, instrument
+from config.routers import (
+    PIN_COOKIE,
+    PRIMARY,
+    ReplicaPinningMiddleware,
+    ReplicaRouter,
+)
+from config.static import StaticFiles, StaticFilesWSGI
+from conduit.articles import live
+from conduit.articles.models import Article, Comment, Tag, TimelineEntry
+from conduit.articles.pagecache import PageCacheMiddleware
+from conduit.articles.pagination import encode_cursor, paginate
+from conduit.articles.rendering import render_body
+from conduit.articles.tags import (
+    POPULAR_TAGS_CACHE_KEY,
+    get_or_create_tags,
+    popular_tags,
+)
+from conduit.articles.timeline import timeline_page
+from conduit.testing import ConduitTestCase
+from conduit.users.models import Profile
+
+
+@override_settings(QUERY_BUDGETS_STRICT=True)
+class QueryBudgetTests(ConduitTestCase):
+    """Requests to the article views stay within their @query_budget"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.reader.profile.follow(cls.author.profile)
+        tags = get_or_create_tags(["tag0", "tag1", "tag2"])
+        # more than a page, so that every query runs once per page, not per row
+        for i in range(25):
+            article = cls.create_article(f"Article {i}")
+            article.tags.add(
+                tags[i % 3], through_defaults={"created_at": article.created_at}
+            )
+            cls.reader.profile.favorite(article)
+            Comment.objects.create(
+                article=article, body="comment", author=cls.author.profile
+            )
+        cls.article = article
+
+    def get_urls(self):
+        article = {"slug": self.article.slug, "uuid": self.article.uuid}
+        return [
+            reverse("home"),
+            reverse("home_tag", args=["tag0"]),
+            reverse("search") + "?q=article",
+            reverse("article_detail", kwargs=article),
+            reverse("comment_list", kwargs=article),
+        ]
+
+    def test_anonymous(self):
+        for url in self.get_urls():
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_logged_in(self):
+        self.client.force_login(self.reader)
+        for url in self.get_urls() + [reverse("home_feed")]:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+                response = self.client.get(url, headers={"HX-Request": "true"})
+                self.assertEqual(response.status_code, 200)
+
+    def test_favorite(self):
+        self.client.force_login(self.reader)
+        url = reverse(
+            "article_favorite",
+            kwargs={"slug": self.article.slug, "uuid": self.article.uuid},
+        )
+        for _ in range(2):
+            response = self.client.post(url, headers={"HX-Request": "true"})
+            self.assertEqual(response.status_code, 200)
+
+
+class InstrumentTests(TestCase):
+    def test_duplicates(self):
+        with instrument() as stats:
+            for pk in range(3):
+                Article.objects.filter(pk=pk).exists()
+            list(Article.objects.filter(pk__in=[1, 2]))
+            list(Article.objects.filter(pk__in=[1, 2, 3]))
+        self.assertEqual(stats.query_count, 5)
+        self.assertEqual(sorted(stats.duplicates.values()), [2, 3])
+
+    def test_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with instrument(budget=1):
+                Article.objects.count()
+                Article.objects.count()
+
+    def test_nested(self):
+        with instrument() as outer:
+            Article.objects.count()
+            with instrument() as inner:
+                Article.objects.count()
+        self.assertEqual((outer.query_count, inner.query_count), (2, 1))
+
+    def test_new_connection(self):
+        # e.g. opened by another thread
+        connection = connections.create_connection(PRIMARY)
+        try:
+            with instrument() as stats:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+        finally:
+            connection.close()
+        self.assertEqual(stats.query_count, 1)
+
+    def test_templates(self):
+        # not served from the page cache
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        with instrument() as stats:
+            self.client.get(reverse("home"))
+        self.assertEqual(stats.templates["home.html"][0], 1)
+        self.assertIn("nav.html", stats.templates)
+        self.assertGreater(stats.template_time, 0)
+        self.assertGreaterEqual(stats.template_time, stats.templates["home.html"][1])
+
+
+class ConditionalGetTests(ConduitTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.article = cls.create_article()
+
+    def assertRevalidates(self, url, change):
+        # the first response sets the CSRF cookie, which the ETag depends on
+        self.client.get(url)
+        etag = self.client.get(url)["ETag"]
+        headers = {"If-None-Match": etag}
+        self.assertEqual(self.client.get(url, headers=headers).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertEqual(self.client.get(url, headers=headers).status_code, 200)
+
+    def test_article_detail(self):
+        self.client.force_login(self.reader)
+        url = self.article.get_absolute_url()
+        profile = self.reader.profile
+        self.assertRevalidates(url, lambda: profile.toggle_favorite(self.article))
+        self.assertRevalidates(url, lambda: profile.toggle_follow(self.article.author))
+        self.assertRevalidates(
+            url,
+            lambda: Comment.objects.create(
+                article=self.article, body="comment", author=profile
+            ),
+        )
+
+    def test_home(self):
+        self.assertRevalidates(
+            reverse("home"),
+            lambda: Article.objects.create(
+                title="New", description="d", body="b", author=self.article.author
+            ),
+        )
+
+
+class PageCacheTests(ConduitTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.article = cls.create_article()
+
+    def setUp(self):
+        super().setUp()
+        # the pages outlive the test database transactions too
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+
+    def test_anonymous_hit(self):
+        url = self.article.get_absolute_url()
+        response = self.client.get(url)
+        self.assertNotContains(response, "csrfmiddlewaretoken")
+        with instrument() as stats:
+            self.assertEqual(self.client.get(url).content, response.content)
+        self.assertEqual(stats.query_count, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                article=self.article, body="new comment", author=self.article.author
+            )
+        self.assertContains(self.client.get(url), "new comment")
+
+    def test_uncacheable_concurrency(self):
+        # views not calling depends_on() answer concurrent requests in parallel
+        barrier = threading.Barrier(2, timeout=1)
+
+        def view(request):
+            barrier.wait()
+            return HttpResponse("uncacheable")
+
+        middleware = PageCacheMiddleware(view)
+        requests = [RequestFactory().get("/api/articles") for _ in range(2)]
+        threads = [
+            threading.Thread(target=middleware, args=[request]) for request in requests
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(barrier.broken)
+
+    def test_logged_in(self):
+        self.client.force_login(self.article.author.user)
+        self.client.get(reverse("home"))
+        with instrument() as stats:
+            self.client.get(reverse("home"))
+        self.assertGreater(stats.query_count, 0)
+
+
+@override_settings(ROOT_URLCONF="config.asgi_urls", QUERY_BUDGETS_STRICT=True)
+class AsyncViewTests(ConduitTestCase):
+    """The async versions of the read views, served to ASGI deployments"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.article = cls.create_article()
+        cls.reader.profile.follow(cls.author.profile)
+        cls.reader.profile.favorite(cls.article)
+
+    async def test_views(self):
+        await self.async_client.aforce_login(self.reader)
+        for url, text in [
+            (reverse("home"), "Article"),
+            (self.article.get_absolute_url(), "Unfollow"),
+            (reverse("profile_detail", args=["author"]), "Unfollow"),
+            (reverse("profile_favorites", args=["author"]), "Article"),
+        ]:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertContains(response, text)
+                # the viewer's favorites and follows are shown
+                self.assertContains(response, "btn-primary")
+
+        url = reverse(
+            "article_detail", kwargs={"slug": "other", "uuid": self.article.uuid}
+        )
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(LIVE_EVENTS_ENABLED=True)
+class LiveEventsTests(ConduitTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.article = cls.create_article()
+
+    async def test_stream(self):
+        kwargs = {"slug": self.article.slug, "uuid": self.article.uuid}
+        response = await self.async_client.get(reverse("article_events", kwargs=kwargs))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = aiter(response.streaming_content)
+        self.assertIn(b"retry:", await anext(events))
+
+        @sync_to_async
+        def publish():
+            with self.captureOnCommitCallbacks(execute=True):
+                html = "<span>1</span>\n<span>2</span>"
+                live.publish(self.article.pk, "favorites", html)
+                live.publish(self.article.pk, "comment", "<div></div>", origin=1)
+                live.publish(self.article.pk + 1, "comment", "<div></div>")
+
+        await publish()
+        self.assertEqual(
+            await anext(events),
+            b"event: favorites\ndata: <span>1</span>\ndata: <span>2</span>\n\n",
+        )
+        # not skipped: the stream is anonymous
+        self.assertEqual(
+            await anext(events), b"event: comment\ndata: <div></div>\n\n"
+        )
+
+    def test_published(self):
+        kwargs = {"slug": self.article.slug, "uuid": self.article.uuid}
+        self.client.force_login(self.reader)
+        with mock.patch.object(live, "publish") as publish:
+            self.client.post(reverse("comment_create", kwargs=kwargs), {"body": "Hi"})
+            comment = Comment.objects.get()
+            self.client.post(reverse("article_favorite", kwargs=kwargs))
+            self.client.post(
+                reverse("comment_delete", kwargs={**kwargs, "pk": comment.pk})
+            )
+        events = [call.args[1] for call in publish.call_args_list]
+        self.assertEqual(events, ["comment", "favorites", "comment-deleted"])
+        self.assertIn("Hi", publish.call_args_list[0].args[2])
+        self.assertIn(">1</span>", publish.call_args_list[1].args[2])
+
+    def test_disabled(self):
+        url = reverse(
+            "article_events",
+            kwargs={"slug": self.article.slug, "uuid": self.article.uuid},
+        )
+        with self.settings(LIVE_EVENTS_ENABLED=False):
+            self.assertEqual(self.client.get(url).status_code, 204)
+
+
+class StaticFilesTests(TestCase):
+    """Collected files are fingerprinted, compressed and served before Django"""
+
+    def setUp(self):
+        root, sources = tempfile.TemporaryDirectory(), tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.addCleanup(sources.cleanup)
+        with open(f"{sources.name}/test.css", "w") as f:
+            f.write(".test { color: red; }\n" * 100)
+        overrides = override_settings(
+            STATIC_ROOT=root.name,
+            STORAGES={
+                **settings.STORAGES,
+                "staticfiles": {
+                    "BACKEND": "config.static.CompressedManifestStaticFilesStorage"
+                },
+            },
+            STATICFILES_DIRS=[*settings.STATICFILES_DIRS, sources.name],
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+        self.application = StaticFilesWSGI(
+            lambda environ, start_response: self.fail("reached Django"),
+            StaticFiles.from_settings(),
+        )
+
+    def get(self, url, **environ):
+        response = {}
+
+        def start_response(status, headers):
+            response.update(status=status, headers=dict(headers))
+
+        environ = {"REQUEST_METHOD": "GET", "PATH_INFO": url, **environ}
+        body = b"".join(self.application(environ, start_response))
+        return response["status"], response["headers"], body
+
+    def test_hashed(self):
+        url = static("test.css")
+        self.assertRegex(url, r"^/static/test\.[0-9a-f]{12}\.css$")
+
+        status, headers, body = self.get(url)
+        self.assertEqual(status, "200 OK")
+        self.assertIn("immutable", headers["Cache-Control"])
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertEqual(int(headers["Content-Length"]), len(body))
+
+        status, headers, compressed = self.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertLess(len(compressed), len(body))
+
+        status, _, body = self.get(url, HTTP_IF_NONE_MATCH=headers["ETag"])
+        self.assertEqual((status, body), ("304 Not Modified", b""))
+
+    def test_unhashed(self):
+        status, headers, _ = self.get("/static/icons/favicon.ico")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(headers["Cache-Control"], "public, max-age=60")
+
+    def test_vendored(self):
+        # stylesheets load the fonts by their hashed names
+        status, _, body = self.get(static("vendor/ionicons/css/ionicons.min.css"))
+        self.assertEqual(status, "200 OK")
+        self.assertRegex(body.decode(), r"\.\./fonts/ionicons\.[0-9a-f]{12}\.woff")
+        self.assertEqual(self.get(static("vendor/fonts/fonts.css"))[0], "200 OK")
+
+
+@skipUnless(importlib.util.find_spec("markdown"), "requires the markdown package")
+class MarkdownRenderingTests(TestCase):
+    """Rendered bodies keep no link or image to a script URL"""
+
+    def test_unsafe_urls(self):
+        for body in (
+            "[x](javascript:alert(1))",
+            "[x](&#106;avascript:alert(1))",
+            "[x](java&#x09;script:alert(1))",
+            "[x](javascript&#58;alert(1))",
+            "[x](JaVaScRiPt:alert(1))",
+            "![x](&#x6A;avascript:alert(1))",
+            "[x](data:text/html,<script>alert(1)</script>)",
+        ):
+            with self.subTest(body=body):
+                html = render_body(body, "markdown")
+                self.assertNotIn("href", html)
+                self.assertNotIn("src", html)
+
+    def test_safe_urls(self):
+        for url in (
+            "https://example.com/a?b=1&amp;c=2",
+            "http://example.com",
+            "mailto:someone@example.com",
+            "/profile/someone",
+            "#comments",
+        ):
+            with self.subTest(url=url):
+                html = render_body(f"[x]({url})", "markdown")
+                self.assertIn(f'href="{url}"', html)
+
+    def test_raw_html(self):
+        html = render_body('<script>alert(1)</script><a href="x">x</a>', "markdown")
+        self.assertNotIn("<script>", html)
+        self.assertNotIn("<a ", html)
+
+
+class ReplicaRouterTests(TestCase):
+    """Reads go to a replica file unless the client must read its writes"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # a replica file of its own: the test mirrors of CONDUIT_REPLICAS are
+        # read through the primary
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        database = {
+            **copy.deepcopy(connections[PRIMARY].settings_dict),
+            "NAME": f"{directory.name}/replica.sqlite3",
+        }
+        connections["replica"] = load_backend(database["ENGINE"]).DatabaseWrapper(
+            database, "replica"
+        )
+        cls.addClassCleanup(connections.__delitem__, "replica")
+        cls.addClassCleanup(connections["replica"].close)
+        with connections["replica"].schema_editor() as editor:
+            editor.create_model(Tag)
+        Tag.objects.using("replica").create(name="Replicated", slug="replicated")
+        cls.enterClassContext(override_settings(DATABASE_REPLICAS=["replica"]))
+
+    def test_read(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Tag), "replica")
+        self.assertTrue(Tag.objects.filter(slug="replicated").exists())
+        Tag.objects.create(name="Written", slug="written")
+        self.assertTrue(Tag.objects.using(PRIMARY).filter(slug="written").exists())
+        self.assertFalse(Tag.objects.filter(slug="written").exists())
+
+    def test_pinning(self):
+        reads = []
+
+        def view(request):
+            reads.append(ReplicaRouter().db_for_read(Tag))
+            if request.method == "POST":
+                Tag.objects.create(name="Written", slug="written")
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        factory = RequestFactory()
+        response = middleware(factory.get("/"))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        response = middleware(factory.post("/"))
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie["max-age"], settings.REPLICA_PIN_SECONDS)
+
+        factory.cookies[PIN_COOKIE] = cookie.value
+        middleware(factory.get("/"))
+        self.assertEqual(reads, ["replica", PRIMARY, PRIMARY])
+
+    def test_migrate(self):
+        router = ReplicaRouter()
+        self.assertTrue(router.allow_migrate(PRIMARY, "articles"))
+        self.assertFalse(router.allow_migrate("replica", "articles"))
+
+    def test_mirror(self):
+        with self.settings(DATABASE_REPLICAS=[PRIMARY]):
+            self.assertEqual(ReplicaRouter().db_for_read(Tag), PRIMARY)
+        self.assertEqual(ReplicaRouter().db_for_read(get_user_model()), "replica")
+
+
+@override_settings(
+    TIMELINE_ENABLED=True, TIMELINE_FANOUT_MAX_FOLLOWERS=2, JOBS_EAGER=True
+)
+class TimelineTests(TestCase):
+    """Follow feeds merge fanned out articles with those of popular authors"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.reader, self.author, self.popular, *others = [
+            User.objects.create_user(name, f"{name}@example.com", "pw").profile
+            for name in ("reader", "author", "popular", "other1", "other2")
+        ]
+        self.reader.follow(self.author)
+        for profile in (self.reader, *others):
+            profile.follow(self.popular)
+        self.others = others
+
+    def publish(self, author, count=1):
+        return [
+            Article.objects.create(
+                title=f"{author.user.username} {i}",
+                description="description",
+                body="body",
+                author=author,
+            )
+            for i in range(count)
+        ]
+
+    def read_feed(self, page_size):
+        articles, cursor = [], None
+        while True:
+            page = timeline_page(self.reader, cursor, page_size)
+            articles += page
+            cursor = page.next_cursor
+            if cursor is None:
+                return articles
+
+    def test_fan_out(self):
+        [article] = self.publish(self.author)
+        [popular_article] = self.publish(self.popular)
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list("owner", "article")),
+            [(self.reader.pk, article.pk)],
+        )
+        self.assertEqual(self.read_feed(10), [popular_article, article])
+
+    def test_merged_pages(self):
+        articles = []
+        for _ in range(4):
+            articles += self.publish(self.author, 2)
+            articles += self.publish(self.popular, 1)
+        articles.reverse()
+        for page_size in (1, 2, 3, 5, 20):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.read_feed(page_size), articles)
+
+    def test_no_longer_popular(self):
+        popular_articles = self.publish(self.popular, 2)
+        self.others[0].unfollow(self.popular)
+        self.popular.refresh_from_db()
+        self.assertEqual(self.popular.followers_count, 2)
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list("owner", "article")),
+            {
+                (owner.pk, article.pk)
+                for owner in (self.reader, self.others[1])
+                for article in popular_articles
+            },
+        )
+        self.assertEqual(self.read_feed(10), popular_articles[::-1])
+
+    def test_toggled_no_longer_popular(self):
+        # the follow views and the API toggle, which sends post_remove only
+        popular_articles = self.publish(self.popular, 2)
+        self.assertFalse(self.others[0].toggle_follow(self.popular))
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list("owner", "article")),
+            {
+                (owner.pk, article.pk)
+                for owner in (self.reader, self.others[1])
+                for article in popular_articles
+            },
+        )
+        self.assertEqual(self.read_feed(10), popular_articles[::-1])
+
+
+class CounterTests(TestCase):
+    """Denormalized counters follow changes from both sides of the relations"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.profiles = [
+            User.objects.create_user(f"user{i}", f"user{i}@example.com", "pw").profile
+            for i in range(3)
+        ]
+        cls.articles = [
+            Article.objects.create(
+                title=f"Article {i}",
+                description="description",
+                body="body",
+                author=cls.profiles[0],
+            )
+            for i in range(3)
+        ]
+
+    def assertCounts(self, favorites, comments=(0, 0, 0)):
+        self.assertEqual(
+            [
+                (article.favorites_count, article.comments_count)
+                for article in Article.objects.order_by("pk")
+            ],
+            list(zip(favorites, comments)),
+        )
+        for article in Article.objects.all():
+            self.assertEqual(article.favorites_count, article.favorited.count())
+            self.assertEqual(article.comments_count, article.comments.count())
+
+    def test_favorites(self):
+        first, second, third = self.articles
+        reader, other = self.profiles[1:]
+        reader.favorites.add(first, second)
+        reader.favorites.add(second, third)
+        self.assertCounts([1, 1, 1])
+        first.favorited.add(other, reader)
+        self.assertCounts([2, 1, 1])
+        # not favorited by `other`: unchanged
+        other.favorites.remove(first, second)
+        self.assertCounts([1, 1, 1])
+        second.favorited.remove(other, reader)
+        self.assertCounts([1, 0, 1])
+        first.favorited.clear()
+        self.assertCounts([0, 0, 1])
+        other.favorites.add(third)
+        reader.favorites.clear()
+        self.assertCounts([0, 0, 1])
+        third.favorited.set([reader])
+        self.assertCounts([0, 0, 1])
+
+    def test_comments(self):
+        comment = Comment.objects.create(
+            article=self.articles[0], body="comment", author=self.profiles[1]
+        )
+        Comment.objects.create(
+            article=self.articles[0], body="comment", author=self.profiles[2]
+        )
+        self.assertCounts([0, 0, 0], [2, 0, 0])
+        comment.delete()
+        self.assertCounts([0, 0, 0], [1, 0, 0])
+
+    def test_reconcile(self):
+        self.profiles[1].favorites.add(*self.articles)
+        self.profiles[1].follows.add(self.profiles[0])
+        Comment.objects.create(
+            article=self.articles[1], body="comment", author=self.profiles[1]
+        )
+        # drift, e.g. from rows written without signals
+        Article.objects.filter(pk=self.articles[0].pk).update(favorites_count=5)
+        Article.objects.filter(pk=self.articles[1].pk).update(comments_count=0)
+        Profile.objects.update(followers_count=3)
+
+        call_command("reconcile_counters", stdout=io.StringIO())
+        self.assertCounts([1, 1, 1], [0, 1, 0])
+        self.assertEqual(
+            list(Profile.objects.order_by("pk").values_list("followers_count")),
+            [(1,), (0,), (0,)],
+        )
+
+
+@override_settings(ARTICLES_PAGE_SIZE=3)
+class PaginationTests(ConduitTestCase):
+    """Feeds are walked with keyset cursors, newest first"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        articles = [cls.create_article(f"Article {i}") for i in range(8)]
+        # ties on created_at, across page boundaries, are broken by id
+        Article.objects.filter(pk__in=[a.pk for a in articles[1:6]]).update(
+            created_at=articles[1].created_at
+        )
+        cls.ids = list(
+            Article.objects.order_by("-created_at", "-pk").values_list("pk", flat=True)
+        )
+
+    def setUp(self):
+        super().setUp()
+        # the page cache would answer without the context of the pages
+        self.client.force_login(self.reader)
+
+    def test_walk(self):
+        for headers in ({}, {"HX-Request": "true"}):
+            ids, cursor, pages = [], "", 0
+            while cursor is not None:
+                with self.subTest(headers=headers, cursor=cursor):
+                    response = self.client.get(
+                        reverse("home"), {"cursor": cursor}, headers=headers
+                    )
+                    self.assertEqual(response.status_code, 200)
+                page = response.context["feed"]
+                ids += [article.pk for article in page]
+                cursor, pages = page.next_cursor, pages + 1
+            self.assertEqual(ids, self.ids)
+            self.assertEqual(pages, 3)
+
+    def test_page_sizes(self):
+        for page_size in range(1, 9):
+            ids, cursor = [], None
+            while True:
+                page = paginate(Article.objects.all(), cursor, page_size)
+                self.assertLessEqual(len(page), page_size)
+                ids += [article.pk for article in page]
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+            with self.subTest(page_size=page_size):
+                self.assertEqual(ids, self.ids)
+
+    def test_invalid_cursor(self):
+        for cursor in [
+            "nope",
+            "%%%",
+            encode_cursor(timezone.now(), "x"),
+            base64.urlsafe_b64encode(b"\xff|1").decode(),
+            base64.urlsafe_b64encode(b"yesterday|1").decode(),
+        ]:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse("home"), {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+
+        # a well-formed cursor past the last article is an empty last page
+        last = Article.objects.get(pk=self.ids[-1])
+        cursor = encode_cursor(last.created_at, last.pk)
+        page = self.client.get(reverse("home"), {"cursor": cursor}).context["feed"]
+        self.assertEqual((list(page), page.next_cursor), ([], None))
+
+
+class PreviewCacheTests(ConduitTestCase):
+    """Cached previews are rendered again when what they show changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.article = cls.create_article()
+
+    def setUp(self):
+        super().setUp()
+        # not served from the page cache
+        self.client.force_login(self.reader)
+
+    def assertRendered(self, change, text):
+        self.client.get(reverse("home"))
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertContains(self.client.get(reverse("home")), text)
+
+    def test_cached(self):
+        self.client.get(reverse("home"))
+        # written without signals: the cached preview is served
+        Article.objects.filter(pk=self.article.pk).update(title="Unseen")
+        self.assertNotContains(self.client.get(reverse("home")), "Unseen")
+
+    def test_article(self):
+        def edit():
+            self.article.title = "Edited"
+            self.article.save()
+
+        self.assertRendered(edit, "Edited")
+
+    def test_username(self):
+        def rename():
+            self.author.username = "renamed"
+            self.author.save()
+
+        self.assertRendered(rename, "renamed")
+
+    def test_image(self):
+        def change_image():
+            profile = self.author.profile
+            profile.image = "https://example.com/new.png"
+            profile.save()
+
+        self.assertRendered(change_image, "https://example.com/new.png")
+
+
+@override_settings(COMMENTS_PAGE_SIZE=2)
+class CommentPagesTests(ConduitTestCase):
+    """The comments of an article come in pages, the next ones loaded by htmx"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.article = cls.create_article()
+        for i in range(5):
+            Comment.objects.create(
+                article=cls.article, body=f"comment {i}", author=cls.reader.profile
+            )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.reader)
+
+    def assertComments(self, response, expected):
+        bodies = [f"comment {i}" for i in range(5)]
+        for body in bodies:
+            if body in expected:
+                self.assertContains(response, body)
+            else:
+                self.assertNotContains(response, body)
+
+    def test_show_more(self):
+        response = self.client.get(self.article.get_absolute_url())
+        self.assertComments(response, ["comment 4", "comment 3"])
+        kwargs = {"slug": self.article.slug, "uuid": self.article.uuid}
+        url = reverse("comment_list", kwargs=kwargs)
+
+        for expected in (["comment 2", "comment 1"], ["comment 0"]):
+            cursor = response.context["comments"].next_cursor
+            self.assertContains(response, "Show more comments")
+            self.assertContains(response, f'hx-get="{url}?cursor={cursor}"')
+            response = self.client.get(
+                url, {"cursor": cursor}, headers={"HX-Request": "true"}
+            )
+            self.assertTemplateUsed(response, "comment_list_page.html")
+            self.assertNotContains(response, "<html")
+            self.assertComments(response, expected)
+        self.assertNotContains(response, "Show more comments")
+
+
+@override_settings(ARTICLES_PAGE_SIZE=2)
+class TagTests(ConduitTestCase):
+    """Tag feeds, and the popular tags of the sidebar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tags = {
+            tag.name: tag
+            for tag in get_or_create_tags(["python", "django", "htmx", "rust"])
+        }
+        cls.articles = []
+        for names in (["python", "django"], ["python"], ["python", "htmx"], []):
+            article = cls.create_article()
+            article.tags.add(
+                *[cls.tags[name] for name in names],
+                through_defaults={"created_at": article.created_at},
+            )
+            cls.articles.append(article)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.reader)
+
+    def test_feed(self):
+        url = reverse("home_tag", kwargs={"tag": "python"})
+        articles, cursor = [], ""
+        while cursor is not None:
+            response = self.client.get(url, {"cursor": cursor})
+            self.assertEqual(response.context["tag"], self.tags["python"])
+            articles += response.context["feed"]
+            cursor = response.context["feed"].next_cursor
+        self.assertEqual(articles, self.articles[2::-1])
+
+        response = self.client.get(reverse("home_tag", kwargs={"tag": "htmx"}))
+        self.assertEqual(list(response.context["feed"]), [self.articles[2]])
+        response = self.client.get(reverse("home_tag", kwargs={"tag": "nope"}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_preview_tags(self):
+        # the tags of previews are inside the preview link: not links themselves
+        response = self.client.get(reverse("home"), headers={"HX-Request": "true"})
+        self.assertContains(response, "python")
+        self.assertNotContains(response, reverse("home_tag", kwargs={"tag": "python"}))
+        response = self.client.get(self.articles[0].get_absolute_url())
+        self.assertContains(response, reverse("home_tag", kwargs={"tag": "python"}))
+
+    def test_popular(self):
+        # by number of articles, then by name; unused tags aren't listed
+        self.assertEqual(
+            [tag.name for tag in popular_tags()], ["python", "django", "htmx"]
+        )
+        cache.delete(POPULAR_TAGS_CACHE_KEY)
+        with self.settings(POPULAR_TAGS_COUNT=2):
+            self.assertEqual([tag.name for tag in popular_tags()], ["python", "django"])
+            response = self.client.get(reverse("home"))
+        self.assertEqual(
+            [tag.name for tag in response.context["popular_tags"]],
+            ["python", "django"],
+        )
+
+    def test_popular_cached(self):
+        popular_tags()
+        self.articles[3].tags.add(
+            self.tags["rust"],
+            through_defaults={"created_at": self.articles[3].created_at},
+        )
+        self.assertNotIn("rust", [tag.name for tag in popular_tags()])
+        cache.delete(POPULAR_TAGS_CACHE_KEY)
+        self.assertIn("rust", [tag.name for tag in popular_tags()])
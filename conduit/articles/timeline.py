@@ -0,0 +1,183 @@
+"""
+Materialized follow feeds ("fan-out on write").
+
+When `TIMELINE_ENABLED` is set, every published article is copied into the
+timeline of each follower of its author, and following a profile copies its
+latest articles into the follower's timeline, by background jobs (see
+conduit.articles.tasks); unfollowing removes them right away. Authors
+followed by more than `TIMELINE_FANOUT_MAX_FOLLOWERS` profiles aren't fanned
+out: their articles are read from the articles table and merged in when the
+feed is read. When they fall back under the limit, their latest articles are
+fanned out to their followers (`backfill_followers`), since feeds stop
+merging them in.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from conduit.users.models import Profile
+
+from .models import Article, TimelineEntry
+from .pagination import KeysetPage, encode_cursor, paginate
+
+Follow = Profile.follows.through
+
+
+def _entries(owner_ids, articles):
+    return [
+        TimelineEntry(
+            owner_id=owner_id,
+            article_id=article.pk,
+            author_id=article.author_id,
+            created_at=article.created_at,
+        )
+        for owner_id in owner_ids
+        for article in articles
+    ]
+
+
+def fan_out(article_id):
+    """Copy the article into the timeline of every follower of its author"""
+
+    article = (
+        Article.objects.filter(pk=article_id)
+        .select_related("author")
+        .only("pk", "created_at", "author", "author__followers_count")
+        .first()
+    )
+    if article is None:
+        return
+    if article.author.followers_count > settings.TIMELINE_FANOUT_MAX_FOLLOWERS:
+        return
+
+    followers = Follow.objects.filter(to_profile_id=article.author_id).values_list(
+        "from_profile_id", flat=True
+    )
+    TimelineEntry.objects.bulk_create(
+        _entries(followers.iterator(), [article]),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(owner_ids, author_ids):
+    """Copy the latest articles of `author_ids` into the timelines of `owner_ids`"""
+
+    for author in Profile.objects.filter(
+        pk__in=author_ids,
+        followers_count__lte=settings.TIMELINE_FANOUT_MAX_FOLLOWERS,
+    ).only("pk"):
+        _copy_latest(owner_ids, author.pk)
+
+
+def _copy_latest(owner_ids, author_id):
+    articles = list(
+        Article.objects.filter(author_id=author_id)
+        .order_by("-created_at", "-pk")
+        .only("pk", "author_id", "created_at")[: settings.TIMELINE_BACKFILL_SIZE]
+    )
+    TimelineEntry.objects.bulk_create(
+        _entries(owner_ids, articles), batch_size=1000, ignore_conflicts=True
+    )
+
+
+def backfill_follows(follows):
+    """
+    Backfill the timelines of the `(owner_id, author_id)` pairs in `follows`
+    which still follow each other: an unfollow may have pruned them since.
+    """
+
+    owners = defaultdict(set)
+    for owner_id, author_id in follows:
+        owners[author_id].add(owner_id)
+    for author_id, owner_ids in owners.items():
+        following = Follow.objects.filter(
+            to_profile_id=author_id, from_profile_id__in=owner_ids
+        ).values_list("from_profile_id", flat=True)
+        backfill(list(following), [author_id])
+
+
+def backfill_followers(author_ids):
+    """
+    Copy the latest articles of `author_ids` into the timelines of all their
+    followers, for the authors who aren't too popular to be fanned out.
+    """
+
+    limit = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    for author_id in author_ids:
+        # counted from the follows rather than `followers_count`, which the
+        # unfollow that triggered this may not have updated yet
+        followers = list(
+            Follow.objects.filter(to_profile_id=author_id).values_list(
+                "from_profile_id", flat=True
+            )[: limit + 1]
+        )
+        if len(followers) <= limit:
+            _copy_latest(followers, author_id)
+
+
+def prune(owner_ids=None, author_ids=None):
+    """Remove the articles of `author_ids` from the timelines of `owner_ids`"""
+
+    entries = TimelineEntry.objects.all()
+    if owner_ids is not None:
+        entries = entries.filter(owner_id__in=owner_ids)
+    if author_ids is not None:
+        entries = entries.filter(author_id__in=author_ids)
+    entries.delete()
+
+
+def rebuild(owner):
+    """Recompute the whole timeline of `owner` from the profiles they follow"""
+
+    with transaction.atomic():
+        prune(owner_ids=[owner.pk])
+        backfill([owner.pk], owner.follows.values_list("pk", flat=True))
+
+
+def timeline_page(owner, cursor=None, page_size=None):
+    """
+    Return a page of the follow feed of `owner`, newest first.
+
+    The page is a range scan of the owner's timeline merged with the matching
+    page of the authors too popular to be fanned out.
+    """
+
+    page_size = page_size or settings.ARTICLES_PAGE_SIZE
+
+    entries = paginate(
+        TimelineEntry.objects.filter(owner=owner)
+        .select_related("article__author__user")
+        .defer("article__body", "article__body_html"),
+        cursor,
+        page_size,
+        key=("created_at", "article_id"),
+    )
+    articles = [entry.article for entry in entries]
+    has_next = entries.has_next
+
+    popular_authors = owner.follows.filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    )
+    if popular_authors.exists():
+        pulled = paginate(
+            Article.objects.filter(author__in=popular_authors)
+            .select_related("author__user")
+            .defer("body", "body_html"),
+            cursor,
+            page_size,
+        )
+        # an author may have become popular after some articles were fanned out
+        seen = {article.pk for article in articles}
+        articles += [article for article in pulled if article.pk not in seen]
+        articles.sort(key=lambda article: (article.created_at, article.pk))
+        articles.reverse()
+        has_next = has_next or pulled.has_next or len(articles) > page_size
+        articles = articles[:page_size]
+
+    if not has_next or not articles:
+        return KeysetPage(articles)
+    last = articles[-1]
+    return KeysetPage(articles, encode_cursor(last.created_at, last.pk))
@@ -9,7 +9,11 @@ urlpatterns = [
     path("editor/<slug:slug>-<uuid:uuid>", views.article_update, name="article_update"),
     path("editor/<slug:slug>-<uuid:uuid>/delete", views.article_delete, name="article_delete"),
     path("article/<slug:slug>-<uuid:uuid>/comment", views.comment_create, name="comment_create"),
+    path("article/<slug:slug>-<uuid:uuid>/comments", views.comment_list, name="comment_list"),
     path("article/<slug:slug>-<uuid:uuid>/comment/<int:pk>/delete", views.comment_delete, name="comment_delete"),
-    path("feed", views.home, name="home_feed"),
+    path("feed", views.home_feed, name="home_feed"),
+    path("tag/<slug:tag>", views.home_tag, name="home_tag"),
+    path("search", views.search, name="search"),
     path("article/<slug:slug>-<uuid:uuid>/favorite", views.article_favorite, name="article_favorite"),
+    path("article/<slug:slug>-<uuid:uuid>/events", views.article_events, name="article_events"),
 ]
@@ -1,41 +1,235 @@
-from django.shortcuts import get_object_or_404, redirect, render
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 
 from conduit.articles.forms import ArticleForm, CommentForm
-
-from .models import Article, Comment
-
-
+from conduit.users.viewer import aget_viewer
+from config.instrumentation import query_budget
+
+from . import live, pagecache
+from .conditional import conditional_render, page_etag
+from .models import Article, Comment, Tag
+from .feeds import feed_queryset, follows_feed, tag_feed
+from .pagination import KeysetPage, apaginate_request, paginate_request
+from .search import get_backend as get_search_backend
+from .tags import popular_tags
+
+
+def _render_feed(request, page, **extra_context):
+    """Render a feed page, or only its articles for htmx "load more" requests"""
+
+    pagecache.depends_on(
+        request,
+        pagecache.FEED_PAGES,
+        *{("author", article.author.user_id) for article in page},
+    )
+    htmx = request.headers.get("HX-Request")
+    tags = None if htmx else popular_tags()
+    etag = page_etag(
+        request,
+        page,
+        extra=[
+            page.next_cursor,
+            [tag.slug for tag in tags or ()],
+            [str(value) for value in extra_context.values()],
+        ],
+    )
+
+    def render_feed():
+        context = {"feed": page}
+        if htmx:
+            return render(
+                request, "article_list_page.html", {"page": page, **context}
+            )
+        context.update(extra_context, popular_tags=tags)
+        return render(request, "home.html", context)
+
+    return conditional_render(request, etag, render_feed)
+
+
+@query_budget(10)
 def home(request):
     """View all published articles for the global feed"""
 
-    global_feed = Article.objects.order_by("-created_at")
-    context = {"global_feed": global_feed}
+    return _render_feed(
+        request, paginate_request(request, feed_queryset(Article.objects.all()))
+    )
 
-    if request.user.is_authenticated:
-        context["follows_feed"] = Article.objects.filter(
-            author__in=request.user.profile.follows.all()
-        ).order_by("-created_at")
-    else:
-        context["follows_feed"] = None
 
-    return render(request, "home.html", context)
+@query_budget(10)
+async def ahome(request):
+    """
+    `home` for ASGI servers (see config/asgi_urls.py).
 
+    The page and the viewer are loaded with the async ORM and awaited
+    together: Django still runs the queries of a request one after the other
+    in its own thread, but the event loop serves other requests meanwhile.
+    Rendering runs in that thread too, as templates may query.
+    """
 
+    page, _ = await asyncio.gather(
+        apaginate_request(request, feed_queryset(Article.objects.all())),
+        aget_viewer(request),
+    )
+    return await sync_to_async(_render_feed)(request, page)
+
+
+@query_budget(10)
+@login_required
+def home_feed(request):
+    """View the articles of the profiles followed by the current user"""
+
+    return _render_feed(request, follows_feed(request))
+
+
+@query_budget(10)
+def home_tag(request, tag):
+    """View the articles with a given tag"""
+
+    tag = get_object_or_404(Tag, slug=tag)
+    return _render_feed(request, tag_feed(request, tag), tag=tag)
+
+
+def _comments_page(request, article):
+    """Page of the comments of `article` following the `cursor` GET parameter"""
+
+    return paginate_request(
+        request,
+        article.comments.select_related("author__user"),
+        page_size=settings.COMMENTS_PAGE_SIZE,
+    )
+
+
+def _article_context(request, article, comments=None):
+    """Context shared by every render of article_detail.html"""
+
+    if comments is None:
+        comments = _comments_page(request, article)
+    user = request.user
+    return {
+        "article": article,
+        "comments": comments,
+        "is_following": user.is_authenticated
+        and user.profile.is_following(article.author),
+        "live_events": settings.LIVE_EVENTS_ENABLED,
+    }
+
+
+@query_budget(9)
+def search(request):
+    """Ranked full-text search over the articles"""
+
+    query = request.GET.get("q", "").strip()
+    try:
+        offset = max(int(request.GET.get("cursor", 0)), 0)
+    except ValueError:
+        offset = 0
+    page_size = settings.ARTICLES_PAGE_SIZE
+
+    # fetch one extra id to know whether there is a next page
+    ids = []
+    if query:
+        ids = get_search_backend().search(query, offset, page_size + 1)
+    rank = {pk: position for position, pk in enumerate(ids[:page_size])}
+    articles = feed_queryset(Article.objects.filter(pk__in=rank))
+    articles = sorted(articles, key=lambda article: rank[article.pk])
+    next_cursor = str(offset + page_size) if len(ids) > page_size else None
+    page = KeysetPage(articles, next_cursor)
+
+    context = {"query": query, "page": page}
+    if request.headers.get("HX-Request"):
+        # the search box replaces the results, "load more" appends to them
+        template = "article_list_page.html" if offset else "article_list.html"
+        return render(request, template, context)
+    return render(request, "search.html", context)
+
+
+def _render_article(request, article, comments):
+    pagecache.depends_on(
+        request,
+        pagecache.article_page(article.pk),
+        ("author", article.author.user_id),
+        *{("author", comment.author.user_id) for comment in comments},
+    )
+    etag = page_etag(
+        request,
+        [article],
+        profiles=[comment.author.user_id for comment in comments],
+        extra=[[comment.pk for comment in comments], comments.next_cursor],
+    )
+
+    def render_article():
+        context = _article_context(request, article, comments)
+        context["form"] = CommentForm()
+        return render(request, "article_detail.html", context)
+
+    return conditional_render(request, etag, render_article)
+
+
+@query_budget(10)
 def article_detail(request, slug, uuid):
     """Detail view for individual articles"""
 
-    form = CommentForm()
+    article = get_object_or_404(
+        Article.objects.select_related("author__user"), slug=slug, uuid=uuid
+    )
+    return _render_article(request, article, _comments_page(request, article))
+
+
+@query_budget(10)
+async def aarticle_detail(request, slug, uuid):
+    """
+    `article_detail` for ASGI servers: the article, its comments and the
+    viewer are loaded concurrently
+    """
+
+    article, comments, _ = await asyncio.gather(
+        aget_object_or_404(
+            Article.objects.select_related("author__user"), slug=slug, uuid=uuid
+        ),
+        # the uuid alone identifies the article: a wrong slug is a 404 above
+        apaginate_request(
+            request,
+            Comment.objects.filter(article__uuid=uuid).select_related("author__user"),
+            page_size=settings.COMMENTS_PAGE_SIZE,
+        ),
+        aget_viewer(request),
+    )
+    return await sync_to_async(_render_article)(request, article, comments)
+
+
+@require_http_methods(["GET"])
+async def article_events(request, slug, uuid):
+    """Server-Sent Events stream of the changes of an article (see live.py)"""
+
+    if not settings.LIVE_EVENTS_ENABLED:
+        # EventSource doesn't reconnect after a 204
+        return HttpResponse(status=204)
+    article = await aget_object_or_404(Article.objects.only("pk"), slug=slug, uuid=uuid)
+    user = await request.auser()
+    response = StreamingHttpResponse(
+        live.stream(article.pk, user.pk), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # proxies like nginx would buffer the events otherwise
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@query_budget(6)
+@require_http_methods(["GET"])
+def comment_list(request, slug, uuid):
+    """View for the next page of comments of an article ("show more")"""
 
     article = get_object_or_404(Article, slug=slug, uuid=uuid)
-    context = {"article": article, "form": form}
+    context = {"article": article, "comments": _comments_page(request, article)}
 
-    if request.user.is_authenticated:
-        context["is_following"] = request.user.profile.is_following(article.author)
-
-    return render(request, "article_detail.html", context)
+    return render(request, "comment_list_page.html", context)
 
 
 @login_required
@@ -50,6 +244,7 @@ def article_create(request):
             article = form.save(commit=False)
             article.author = request.user.profile
             article.save()
+            form.save_m2m()
             return redirect(article.get_absolute_url())
     else:
         form = ArticleForm()
@@ -103,7 +298,9 @@ def article_delete(request, slug, uuid):
 def comment_create(request, slug, uuid):
     """View for creating comments"""
 
-    article = get_object_or_404(Article, slug=slug, uuid=uuid)
+    article = get_object_or_404(
+        Article.objects.select_related("author__user"), slug=slug, uuid=uuid
+    )
 
     form = CommentForm(request.POST)
 
@@ -112,9 +309,21 @@ def comment_create(request, slug, uuid):
         comment.author = request.user.profile
         comment.article = article
         comment.save()
+        live.publish(
+            article.pk, "comment", live.comment_added(comment), request.user.pk
+        )
+        # htmx only needs the new comment, to prepend it to the list
+        if request.headers.get("HX-Request"):
+            return render(
+                request, "comment.html", {"comment": comment, "article": article}
+            )
         return redirect(comment.get_absolute_url())
 
-    return render(request, "article_detail.html", {"article": article})
+    if request.headers.get("HX-Request"):
+        return HttpResponse(status=422)
+
+    context = {"form": form, **_article_context(request, article)}
+    return render(request, "article_detail.html", context)
 
 
 @login_required
@@ -122,7 +331,9 @@ def comment_create(request, slug, uuid):
 def comment_delete(request, slug, uuid, pk):
     """View for deleting comments"""
 
-    article = get_object_or_404(Article, slug=slug, uuid=uuid)
+    article = get_object_or_404(
+        Article.objects.select_related("author__user"), slug=slug, uuid=uuid
+    )
     comment = get_object_or_404(Comment, pk=pk)
 
     if comment.author != request.user.profile:
@@ -131,12 +342,24 @@ def comment_delete(request, slug, uuid, pk):
         )
 
     if request.method == "POST":
+        live.publish(
+            article.pk,
+            "comment-deleted",
+            live.comment_deleted(comment.pk),
+            request.user.pk,
+        )
         comment.delete()
+        # htmx swaps the deleted comment with this empty response
+        if request.headers.get("HX-Request"):
+            return HttpResponse()
         return redirect(comment.get_absolute_url())
 
-    return render(request, "article_detail.html", {"article": article})
+    return render(
+        request, "article_detail.html", _article_context(request, article)
+    )
 
 
+@query_budget(12)
 @login_required
 @require_http_methods(["POST"])
 def article_favorite(request, slug, uuid):
@@ -144,10 +367,20 @@ def article_favorite(request, slug, uuid):
     
     article = get_object_or_404(Article, slug=slug, uuid=uuid)
     
-    if request.user.profile.has_favorited(article):
-        request.user.profile.unfavorite(article)
-    else:
-        request.user.profile.favorite(article)
+    favorited = request.user.profile.toggle_favorite(article)
+    article.refresh_from_db(fields=["favorites_count"])
+    live.publish(
+        article.pk, "favorites", live.favorites_count(article), request.user.pk
+    )
+
+    # htmx only needs the updated button
+    if request.headers.get("HX-Request"):
+        context = {
+            "article": article,
+            "favorited_ids": {article.pk} if favorited else set(),
+            "full_label": bool(request.POST.get("full_label")),
+        }
+        return render(request, "article_favorite.html", context)
 
     next_url = request.POST.get("next")
     if next_url:
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "run_after", "created_at")
+    list_filter = ("status", "name")
+
+
+admin.site.register(Job, JobAdmin)
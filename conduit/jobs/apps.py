@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    name = 'conduit.jobs'
+
+    def ready(self):
+        # registers the tasks declared in the tasks.py of every app
+        autodiscover_modules("tasks")
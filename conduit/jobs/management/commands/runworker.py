@@ -0,0 +1,88 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from conduit.jobs import worker
+from conduit.jobs.queue import registry
+
+
+def _work_in_process(burst, batch_size):
+    # the process is forked from the command: stop like it on SIGTERM/SIGINT
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stop.set())
+    worker.work(stop, burst, batch_size)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the queued background jobs (see conduit/jobs/queue.py) in a pool "
+        "of threads or processes, until interrupted. SIGTERM and SIGINT let "
+        "the running jobs finish."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of jobs run at the same time (default: 1)",
+        )
+        parser.add_argument(
+            "--pool",
+            choices=("thread", "process"),
+            default="thread",
+            help="Run jobs in threads, or in forked processes for CPU-bound "
+            "tasks (default: thread)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Most jobs of a batch task run at once (default: JOBS_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is ready to run instead of waiting for more",
+        )
+
+    def handle(self, *args, concurrency, pool, batch_size, burst, **options):
+        self.stdout.write(
+            f"Running jobs of {len(registry)} task(s) with {concurrency} "
+            f"{pool}(s)."
+        )
+        stop = threading.Event()
+        if pool == "thread":
+            workers = [
+                threading.Thread(
+                    target=worker.work,
+                    args=(stop, burst, batch_size),
+                    name=f"worker-{index}",
+                )
+                for index in range(concurrency)
+            ]
+        else:
+            # children must open connections of their own
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            workers = [
+                context.Process(target=_work_in_process, args=(burst, batch_size))
+                for _ in range(concurrency)
+            ]
+
+        def shut_down(*args):
+            stop.set()
+            if pool == "process":
+                for runner in workers:
+                    runner.terminate()
+
+        signal.signal(signal.SIGTERM, shut_down)
+        signal.signal(signal.SIGINT, shut_down)
+        for runner in workers:
+            runner.start()
+        for runner in workers:
+            runner.join()
+        self.stdout.write(self.style.SUCCESS("Stopped."))
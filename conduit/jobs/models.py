@@ -0,0 +1,47 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A queued run of a task (see conduit.jobs.queue).
+
+    Jobs are inserted in the transaction of the write they follow, so they
+    exist if and only if it commits, and deleted in the transaction of their
+    run once it succeeds: the table only holds jobs waiting to run, running,
+    or failed for good.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUSES = [(PENDING, "Pending"), (RUNNING, "Running"), (FAILED, "Failed")]
+
+    name = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    # a pending job with the same key absorbs the jobs enqueued after it
+    key = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # pending jobs wait until then; running ones can be taken over after it,
+    # when their worker died
+    run_after = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key"],
+                condition=Q(status="pending"),
+                name="unique_pending_job_key",
+            ),
+        ]
+        # workers scan the jobs ready to run, oldest first
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_ready_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name}{tuple(self.args)}"
@@ -0,0 +1,96 @@
+"""
+Background jobs, queued in the database.
+
+Slow side effects of writes are declared as tasks, in the tasks.py module of
+their app:
+
+    @task(batch=True)
+    def reindex_articles(article_ids):
+        ...
+
+and queued by the write with `reindex_articles.enqueue(article.pk)`. The job
+is a row inserted in the transaction of the write: it's only run if the
+write commits, by `manage.py runworker` (see conduit.jobs.worker), with no
+broker but the database. A failing job is retried JOBS_MAX_ATTEMPTS times,
+backing off exponentially, then kept as failed.
+
+Jobs enqueued with a `key` are coalesced: while a job with that key waits to
+run, enqueuing another one is a no-op, e.g. an article edited three times
+before the worker gets to it is indexed once. Batch tasks are called with
+the arguments of up to JOBS_BATCH_SIZE jobs at once, a list holding one per
+job, so that indexing or copying rows happens in bulk.
+
+With JOBS_EAGER set, jobs run when they are enqueued instead, in the
+process of the write (for tests, or to run without a worker).
+"""
+
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger("conduit.jobs")
+
+# the registered tasks, by name
+registry = {}
+
+
+class Task:
+    def __init__(self, func, name, batch, max_attempts):
+        self.func = func
+        self.name = name
+        self.batch = batch
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    @property
+    def attempts(self):
+        return self.max_attempts or settings.JOBS_MAX_ATTEMPTS
+
+    def run(self, jobs_args):
+        """Run the jobs of this task with arguments `jobs_args`, one per job"""
+
+        if self.batch:
+            self.func([args[0] for args in jobs_args])
+        else:
+            for args in jobs_args:
+                self.func(*args)
+
+    def enqueue(self, *args, key=None, delay=None):
+        """
+        Queue a run of the task with `args`, JSON serializable, in the current
+        transaction. Nothing is queued if a pending job has the same `key`.
+        `delay` is a timedelta the job waits for before running.
+        """
+
+        if self.batch and len(args) != 1:
+            raise TypeError(f"Batch task {self.name} takes a single argument.")
+        if settings.JOBS_EAGER:
+            self.run([list(args)])
+            return
+
+        from .models import Job
+
+        job = Job(name=self.name, args=list(args), key=key)
+        if delay is not None:
+            job.run_after = timezone.now() + delay
+        Job.objects.bulk_create([job], ignore_conflicts=key is not None)
+
+
+def task(name=None, batch=False, max_attempts=None):
+    """
+    Register the decorated function as a task, named `name` or after the
+    function. Batch tasks take the list of the arguments of their jobs.
+    `max_attempts` overrides JOBS_MAX_ATTEMPTS.
+    """
+
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__qualname__}"
+        if task_name in registry:
+            raise ValueError(f"A task named {task_name} is already registered.")
+        registry[task_name] = Task(func, task_name, batch, max_attempts)
+        return registry[task_name]
+
+    return decorator
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from conduit.articles.models import Article
+from conduit.articles.search import get_backend as get_search_backend
+
+from .models import Job
+from .queue import task
+from .worker import claim, run_pending
+
+calls = []
+
+
+@task(name="tests.record", batch=True)
+def record(values):
+    calls.append(values)
+
+
+@task(name="tests.fail", max_attempts=2)
+def fail(value):
+    raise ValueError(value)
+
+
+@override_settings(JOBS_RETRY_DELAY=0)
+class JobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_batch(self):
+        for value in range(5):
+            record.enqueue(value)
+        record.enqueue(2, key="two")
+        record.enqueue(2, key="two")
+        self.assertEqual(Job.objects.count(), 6)
+
+        self.assertEqual(run_pending(batch_size=4), 6)
+        self.assertEqual(calls, [[0, 1, 2, 3], [4, 2]])
+        self.assertFalse(Job.objects.exists())
+
+    def test_retries(self):
+        fail.enqueue("boom", key="boom")
+        with self.assertLogs("conduit.jobs", "ERROR"):
+            self.assertEqual(run_pending(), 2)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn("ValueError: boom", job.error)
+
+    def test_lease(self):
+        record.enqueue(1)
+        self.assertEqual(len(claim()), 1)
+        # claimed by a worker that died
+        self.assertEqual(claim(), [])
+        Job.objects.update(run_after=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [[1]])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager(self):
+        record.enqueue(1)
+        self.assertEqual(calls, [[1]])
+        self.assertFalse(Job.objects.exists())
+
+
+class ArticleJobTests(TestCase):
+    def test_search_index(self):
+        user = get_user_model().objects.create_user("author", "a@example.com", "pw")
+        article = Article.objects.create(
+            title="Queued", description="description", body="body", author=user.profile
+        )
+        article.title = "Queued again"
+        article.save()
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(get_search_backend().search("queued"), [])
+
+        run_pending()
+        self.assertEqual(get_search_backend().search("queued"), [article.pk])
+        article.delete()
+        run_pending()
+        self.assertEqual(get_search_backend().search("queued"), [])
@@ -0,0 +1,135 @@
+"""
+Workers running the queued jobs (see conduit.jobs.queue).
+
+A worker claims the oldest ready job, plus the other ready jobs of the same
+task if it's a batch task, by marking them running in a write transaction:
+on SQLite the transaction holds the write lock (transaction_mode is
+IMMEDIATE, see config/sqlite.py), on other databases the rows are locked
+with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never claim
+the same job. The task then runs in a transaction deleting its jobs: its
+writes and the end of the jobs commit together, or neither does.
+
+A claimed job is leased for JOBS_LEASE_TIMEOUT seconds: the jobs of a worker
+that died are claimed again once their lease expires.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from config.routers import use_primary
+
+from .models import Job
+from .queue import registry
+
+logger = logging.getLogger("conduit.jobs")
+
+
+def _ready_jobs(now):
+    # running jobs are ready once their lease expired
+    return Job.objects.filter(
+        status__in=[Job.PENDING, Job.RUNNING], run_after__lte=now
+    ).order_by("run_after", "pk")
+
+
+def claim(batch_size=None):
+    """Claim the next jobs to run together, all of the same task"""
+
+    batch_size = batch_size or settings.JOBS_BATCH_SIZE
+    now = timezone.now()
+    # idle workers poll without taking the write lock
+    if not _ready_jobs(now).exists():
+        return []
+    with transaction.atomic():
+        first = _ready_jobs(now).select_for_update(skip_locked=True).first()
+        if first is None:
+            return []
+        task = registry.get(first.name)
+        jobs = [first]
+        if task is not None and task.batch and batch_size > 1:
+            jobs = list(
+                _ready_jobs(now)
+                .filter(name=first.name)
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.RUNNING,
+            attempts=F("attempts") + 1,
+            run_after=now + timedelta(seconds=settings.JOBS_LEASE_TIMEOUT),
+        )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def run(jobs):
+    """Run claimed `jobs`: return True if they succeeded"""
+
+    task = registry.get(jobs[0].name)
+    try:
+        if task is None:
+            raise LookupError(f"No task named {jobs[0].name} is registered.")
+        # jobs follow writes: they must read them, not a replica lagging behind
+        with use_primary(), transaction.atomic():
+            task.run([job.args for job in jobs])
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).delete()
+    except Exception:
+        logger.exception("%d job(s) of %s failed", len(jobs), jobs[0].name)
+        _retry_or_fail(jobs, task, traceback.format_exc())
+        return False
+    return True
+
+
+def _retry_or_fail(jobs, task, error):
+    max_attempts = task.attempts if task is not None else 1
+    now = timezone.now()
+    for job in jobs:
+        if job.attempts < max_attempts:
+            delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            changes = {
+                "status": Job.PENDING,
+                "run_after": now + timedelta(seconds=delay),
+            }
+        else:
+            changes = {"status": Job.FAILED}
+        try:
+            with transaction.atomic():
+                Job.objects.filter(pk=job.pk).update(error=error, **changes)
+        except IntegrityError:
+            # a job with its key was enqueued since: it will do the same work
+            Job.objects.filter(pk=job.pk).delete()
+
+
+def run_pending(batch_size=None, stop=None):
+    """Run jobs until none is ready, or `stop` is set: return how many ran"""
+
+    count = 0
+    while not (stop is not None and stop.is_set()) and (jobs := claim(batch_size)):
+        run(jobs)
+        count += len(jobs)
+    return count
+
+
+def work(stop, burst=False, batch_size=None):
+    """
+    Run jobs until `stop` (a threading.Event) is set, or, with `burst`,
+    until none is ready. Return the number of jobs run.
+    """
+
+    count = 0
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            count += run_pending(batch_size, stop)
+            if burst:
+                break
+            stop.wait(settings.JOBS_POLL_INTERVAL)
+    finally:
+        # workers run in threads or processes of their own
+        connection.close()
+    return count
@@ -0,0 +1,11 @@
+// Live updates of article pages (see conduit/articles/live.py): every event of
+// the stream is an HTML fragment swapped out of band, like htmx responses.
+// EventSource reconnects by itself, after the delay the stream sets.
+document.querySelectorAll("[data-live-events]").forEach((element) => {
+    const source = new EventSource(element.dataset.liveEvents);
+    for (const name of element.dataset.liveSwap.split(",")) {
+        source.addEventListener(name, (event) => {
+            htmx.swap(element, event.data, { swapStyle: "none" });
+        });
+    }
+});
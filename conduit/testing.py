@@ -0,0 +1,32 @@
+"""
+Fixtures shared by the apps' tests.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+
+from conduit.articles.models import Article
+
+
+class ConduitTestCase(TestCase):
+    """A reader and an author, with a clean cache for every test
+
+    The cached viewers and the versions dropped on writes live in the "default"
+    cache, which outlives the test database transactions.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.reader = User.objects.create_user("reader", "reader@example.com", "pw")
+        cls.author = User.objects.create_user("author", "author@example.com", "pw")
+
+    @classmethod
+    def create_article(cls, title="Article", **fields):
+        fields = {"description": "description", "body": "body", **fields}
+        fields.setdefault("author", cls.author.profile)
+        return Article.objects.create(title=title, **fields)
+
+    def setUp(self):
+        caches["default"].clear()
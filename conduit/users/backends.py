@@ -0,0 +1,61 @@
+"""
+Authentication backend caching the viewer.
+
+Every authenticated request loads its user from the session, then its
+profile, then the viewer's favorites and follows (see
+`Profile._social_graph`). `ViewerBackend` loads the user and the profile in
+one query and, when VIEWER_CACHE_TIMEOUT is set, keeps the three of them in
+the cache between requests: a request then costs no query for them at all.
+
+The cached viewer is versioned like article previews (see
+conduit.articles.fragments): by the "author" version of the user, dropped
+when the user or the profile is saved or deleted, and by the "viewer" version
+of the profile, dropped when its favorites or follows change.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from conduit.articles import fragments
+
+from .models import User
+
+
+def _viewer_key(user_id):
+    return f"viewer:{user_id}"
+
+
+class ViewerBackend(ModelBackend):
+    def get_user(self, user_id):
+        try:
+            user = self._get_viewer(user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # ModelBackend's queries the user alone, ignoring the cache
+        return await sync_to_async(self.get_user)(user_id)
+
+    def _get_viewer(self, user_id):
+        queryset = User._default_manager.select_related("profile")
+        timeout = settings.VIEWER_CACHE_TIMEOUT
+        if not timeout:
+            return queryset.get(pk=user_id)
+
+        entry = cache.get(_viewer_key(user_id))
+        if entry is not None:
+            user, versions = entry
+            if fragments.get_versions(versions) == versions:
+                return user
+
+        # versions are read before what they cover, so that a change made
+        # meanwhile makes this copy stale
+        versions = fragments.get_versions([("author", user_id)])
+        user = queryset.get(pk=user_id)
+        versions.update(fragments.get_versions([("viewer", user.profile.pk)]))
+        user.profile._social_graph
+        cache.set(_viewer_key(user_id), (user, versions), timeout)
+        return user
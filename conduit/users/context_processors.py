@@ -0,0 +1,17 @@
+from django.utils.functional import SimpleLazyObject
+
+
+def viewer(request):
+    """
+    Ids of the articles favorited and of the profiles followed by the current
+    user, for templates to check with `in`. They are only loaded if a
+    template uses them, and once per request (see `Profile._social_graph`).
+    """
+
+    user = request.user
+    if not user.is_authenticated:
+        return {"favorited_ids": frozenset(), "following_ids": frozenset()}
+    return {
+        "favorited_ids": SimpleLazyObject(lambda: user.profile.favorited_ids),
+        "following_ids": SimpleLazyObject(lambda: user.profile.following_ids),
+    }
@@ -0,0 +1,14 @@
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ImportedPasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with fewer iterations, to hash the passwords of provisioned users
+    quickly (see conduit.users.provisioning).
+
+    It isn't the preferred hasher: the password is hashed again with the
+    default one when the user first logs in.
+    """
+
+    algorithm = "pbkdf2_sha256_imported"
+    iterations = 10_000
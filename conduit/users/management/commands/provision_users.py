@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from conduit.users.provisioning import provision_users, read_rows
+
+MAX_ERRORS_SHOWN = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users and their profiles in bulk from a CSV or JSON lines file "
+        "(see conduit.users.provisioning for the columns)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='File to read, or "-" for stdin')
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Format of the file (default: from its extension)",
+        )
+        parser.add_argument(
+            "--hasher",
+            default="default",
+            help=(
+                "Hasher of the plain text passwords, e.g. pbkdf2_sha256_imported "
+                "(default: the preferred hasher)"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users created per transaction (default: 1000)",
+        )
+
+    def handle(self, *args, path, format, hasher, batch_size, **options):
+        if format is None:
+            format = Path(path).suffix.lstrip(".").lower()
+            if format not in ("csv", "jsonl"):
+                raise CommandError("Can't tell the format of the file: use --format.")
+
+        if path == "-":
+            result = self.provision(sys.stdin, format, hasher, batch_size)
+        else:
+            with open(path, newline="", encoding="utf-8") as file:
+                result = self.provision(file, format, hasher, batch_size)
+
+        for number, message in result.errors[:MAX_ERRORS_SHOWN]:
+            self.stderr.write(f"Row {number}: {message}")
+        if len(result.errors) > MAX_ERRORS_SHOWN:
+            self.stderr.write(f"... and {len(result.errors) - MAX_ERRORS_SHOWN} more")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {result.created} user(s), skipped {result.skipped} "
+                f"existing one(s), {len(result.errors)} invalid row(s)."
+            )
+        )
+
+    def provision(self, file, format, hasher, batch_size):
+        try:
+            return provision_users(read_rows(file, format), hasher, batch_size)
+        except ValueError as exc:
+            # unknown hasher, or a line that isn't JSON
+            raise CommandError(exc)
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_followers_count(apps, schema_editor):
+    Profile = apps.get_model("users", "Profile")
+
+    followers = (
+        Profile.follows.through.objects.filter(to_profile_id=OuterRef("pk"))
+        .values("to_profile_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    Profile.objects.update(followers_count=Coalesce(Subquery(followers), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_profile_favorites'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_followers_count, migrations.RunPython.noop),
+    ]
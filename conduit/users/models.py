@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import IntegerField, Value
+from django.db.models.signals import m2m_changed
+from django.utils.functional import cached_property
 from django.contrib.auth.models import AbstractUser, UserManager
 
 from config import settings
@@ -71,30 +74,156 @@ class Profile(models.Model):
     favorites = models.ManyToManyField(
         "articles.Article", related_name="favorited", blank=True
     )
+    # denormalized counter kept up to date by conduit.users.signals
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ("followers_count",)
+
+    # relations of the social graph, in the order of `_social_graph`
+    SOCIAL_GRAPH = ("favorites", "follows")
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # the counters loaded with this instance may be stale by now
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    def _social_graph_rows(self):
+        """(index of the relation in SOCIAL_GRAPH, id) rows of the social graph"""
+
+        columns = []
+        for index, relation in enumerate(self.SOCIAL_GRAPH):
+            field = self._meta.get_field(relation)
+            columns.append(
+                field.remote_field.through.objects.filter(
+                    **{f"{field.m2m_field_name()}_id": self.pk}
+                ).values_list(
+                    Value(index, output_field=IntegerField()),
+                    f"{field.m2m_reverse_field_name()}_id",
+                )
+            )
+        return columns[0].union(*columns[1:], all=True)
+
+    def _build_social_graph(self, rows):
+        graph = tuple(set() for _ in self.SOCIAL_GRAPH)
+        for index, pk in rows:
+            graph[index].add(pk)
+        return graph
+
+    @cached_property
+    def _social_graph(self):
+        """
+        The ids of the articles in self.favorites and of the profiles in
+        self.follows, as a pair of sets loaded in a single query.
+
+        Every page checks the viewer's favorites and follows, often more than
+        once: the sets answer them all. Toggles keep them up to date,
+        add()/remove() through the methods below drop them.
+        """
+
+        return self._build_social_graph(self._social_graph_rows())
+
+    async def aload_social_graph(self):
+        """Load the social graph from async code, where properties can't query"""
+
+        if "_social_graph" not in self.__dict__:
+            rows = [row async for row in self._social_graph_rows()]
+            self.__dict__["_social_graph"] = self._build_social_graph(rows)
+
+    @property
+    def favorited_ids(self):
+        """Ids of the articles in self.favorites"""
+        return self._social_graph[0]
+
+    @property
+    def following_ids(self):
+        """Ids of the profiles in self.follows"""
+        return self._social_graph[1]
+
+    def _toggle(self, relation, obj):
+        """
+        Add `obj` to the many-to-many `relation` if it isn't there, remove it
+        otherwise, and return True if it was added.
+
+        The change is a single DELETE, followed by an INSERT if nothing was
+        deleted, against the relation's table, so concurrent toggles can't
+        interleave a read with a write. `m2m_changed` is sent like
+        add()/remove() do (post_add/post_remove only), so its receivers update
+        the counters in the same transaction.
+        """
+
+        field = self._meta.get_field(relation)
+        through = field.remote_field.through
+        row = {
+            f"{field.m2m_field_name()}_id": self.pk,
+            f"{field.m2m_reverse_field_name()}_id": obj.pk,
+        }
+
+        with transaction.atomic(using=self._state.db):
+            deleted, _ = through.objects.filter(**row).delete()
+            if not deleted:
+                try:
+                    with transaction.atomic(using=self._state.db):
+                        through.objects.create(**row)
+                except IntegrityError:
+                    # a concurrent toggle just added it
+                    return True
+            m2m_changed.send(
+                sender=through,
+                instance=self,
+                action="post_remove" if deleted else "post_add",
+                reverse=False,
+                model=type(obj),
+                pk_set={obj.pk},
+                using=self._state.db,
+            )
+        if "_social_graph" in self.__dict__:
+            ids = self._social_graph[self.SOCIAL_GRAPH.index(relation)]
+            if deleted:
+                ids.discard(obj.pk)
+            else:
+                ids.add(obj.pk)
+        return not deleted
+
+    def toggle_follow(self, profile):
+        """Follow `profile` or unfollow it: return True if now following"""
+        return self._toggle("follows", profile)
+
+    def toggle_favorite(self, article):
+        """Add article to Favorites or remove it: return True if now favorited"""
+        return self._toggle("favorites", article)
 
     def follow(self, profile):
         """Follow `profile`"""
         self.follows.add(profile)
+        self.__dict__.pop("_social_graph", None)
 
     def unfollow(self, profile):
         """Unfollow `profile`"""
         self.follows.remove(profile)
+        self.__dict__.pop("_social_graph", None)
 
     def is_following(self, profile):
         """Return True if `profile` is in self.follows, False otherwise"""
-        return self.follows.filter(pk=profile.pk).exists()
+        return profile.pk in self.following_ids
 
     def favorite(self, article):
         """Add article to Favorites"""
         self.favorites.add(article)
+        self.__dict__.pop("_social_graph", None)
 
     def unfavorite(self, article):
         """Remove article from Favorites"""
         self.favorites.remove(article)
+        self.__dict__.pop("_social_graph", None)
 
     def has_favorited(self, article):
         """Return True if article is in Favorite, False otherwise"""
-        return self.favorites.filter(pk=article.pk).exists()
+        return article.pk in self.favorited_ids
 
     def __str__(self):
         return self.user.username
@@ -0,0 +1,136 @@
+"""
+Bulk user provisioning.
+
+`provision_users()` creates users and their profiles from rows (dicts), a
+batch at a time: one transaction and two bulk INSERTs per batch, instead of
+a save and a `create_profile_for_user` INSERT per user. Rows are consumed
+lazily, so large CSV or JSON lines exports can be streamed with
+`read_rows()`. Single signups still go through `create_user()` and the
+post_save signal.
+
+A row has a `username` and an `email`, and optionally:
+
+- `password`: hashed with `hasher`, the preferred hasher by default. Hashing
+  is what makes provisioning slow: "pbkdf2_sha256_imported" is about a
+  hundred times faster, and the password is hashed again with the preferred
+  hasher on first login (see conduit.users.hashers).
+- `password_hash`: a password already hashed by one of PASSWORD_HASHERS,
+  in Django's format, e.g. migrated from another Django site.
+- `bio` and `image`, for the profile.
+
+Users without a password can't log in until they reset it. Rows whose
+username or email is already taken are skipped.
+"""
+
+import csv
+import json
+
+from django.contrib.auth.hashers import get_hasher, identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Profile, User
+
+PROFILE_FIELDS = ("bio", "image")
+
+
+class ProvisioningResult:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        # (row number, message) of the invalid rows
+        self.errors = []
+
+
+def read_rows(file, format):
+    """Iterate over the rows of a "csv" (with a header) or "jsonl" `file`"""
+
+    if format == "csv":
+        yield from csv.DictReader(file)
+    elif format == "jsonl":
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unknown format: {format!r}")
+
+
+def _build_user(row, hasher):
+    """Unsaved user and profile of `row`, raising ValidationError if invalid"""
+
+    user = User(
+        username=(row.get("username") or "").strip(),
+        email=User.objects.normalize_email((row.get("email") or "").strip()),
+    )
+    if row.get("password_hash"):
+        try:
+            identify_hasher(row["password_hash"])
+        except ValueError:
+            raise ValidationError("password_hash: unknown hasher")
+        user.password = row["password_hash"]
+    elif row.get("password"):
+        user.password = make_password(row["password"], hasher=hasher)
+    else:
+        user.set_unusable_password()
+    user.clean_fields()
+
+    profile = Profile(
+        **{field: row[field] for field in PROFILE_FIELDS if row.get(field)}
+    )
+    profile.clean_fields(exclude=["user"])
+    return user, profile
+
+
+def _error_message(exc):
+    if not hasattr(exc, "error_dict"):
+        return "; ".join(exc.messages)
+    return "; ".join(
+        f"{field}: {' '.join(messages)}" for field, messages in exc.message_dict.items()
+    )
+
+
+def _create_batch(batch, result):
+    with transaction.atomic():
+        taken = set()
+        for username, email in User.objects.filter(
+            Q(username__in=[user.username for user, _ in batch])
+            | Q(email__in=[user.email for user, _ in batch])
+        ).values_list("username", "email"):
+            taken.update([("username", username), ("email", email)])
+
+        new = []
+        for user, profile in batch:
+            keys = {("username", user.username), ("email", user.email)}
+            if keys & taken:
+                result.skipped += 1
+                continue
+            # rows of the same batch may conflict too
+            taken |= keys
+            new.append((user, profile))
+
+        User.objects.bulk_create([user for user, _ in new])
+        for user, profile in new:
+            profile.user = user
+        Profile.objects.bulk_create([profile for _, profile in new])
+    result.created += len(new)
+
+
+def provision_users(rows, hasher="default", batch_size=1000):
+    """Create the users of `rows` and their profiles, `batch_size` at a time"""
+
+    # fail before creating anyone if `hasher` doesn't exist
+    hasher = get_hasher(hasher)
+    result = ProvisioningResult()
+    batch = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            batch.append(_build_user(row, hasher))
+        except ValidationError as exc:
+            result.errors.append((number, _error_message(exc)))
+        if len(batch) >= batch_size:
+            _create_batch(batch, result)
+            batch = []
+    if batch:
+        _create_batch(batch, result)
+    return result
@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
+from conduit.articles.signals import FOLLOW_FIELDS, update_m2m_count
+
 from .models import Profile
 
 
@@ -9,3 +11,14 @@ from .models import Profile
 def create_profile_for_user(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+
+
+@receiver(m2m_changed, sender=Profile.follows.through)
+def update_followers_count(sender, **kwargs):
+    """Keep `Profile.followers_count` in sync with `Profile.follows`"""
+    update_m2m_count(
+        sender,
+        fields=FOLLOW_FIELDS,
+        counter=(Profile, "followers_count"),
+        **kwargs,
+    )
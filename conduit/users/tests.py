@@ -1,3 +1,204 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from config.instrumentation import instrument
+from conduit.articles.models import Article
+from conduit.users.models import Profile, User
+from conduit.testing import ConduitTestCase
+from conduit.users.provisioning import provision_users
+
+
+@override_settings(QUERY_BUDGETS_STRICT=True)
+class QueryBudgetTests(ConduitTestCase):
+    """Requests to the profile views stay within their @query_budget"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(25):
+            cls.reader.profile.favorite(cls.create_article(f"Article {i}"))
+
+    def test_profile(self):
+        for logged_in in (False, True):
+            if logged_in:
+                self.client.force_login(self.reader)
+            for name in ("profile_detail", "profile_favorites"):
+                url = reverse(name, args=[self.author.username])
+                with self.subTest(url=url, logged_in=logged_in):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_follow(self):
+        self.client.force_login(self.reader)
+        url = reverse("profile_follow", args=[self.author.username])
+        for _ in range(2):
+            response = self.client.post(url, headers={"HX-Request": "true"})
+            self.assertEqual(response.status_code, 200)
+
+
+class ViewerTests(ConduitTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.article = cls.create_article()
+
+    def test_social_graph(self):
+        profile = Profile.objects.get(pk=self.reader.profile.pk)
+        with self.assertNumQueries(1):
+            self.assertFalse(profile.has_favorited(self.article))
+            self.assertFalse(profile.is_following(self.author.profile))
+        # toggles update the loaded sets
+        profile.toggle_favorite(self.article)
+        profile.toggle_follow(self.author.profile)
+        with self.assertNumQueries(0):
+            self.assertEqual(profile.favorited_ids, {self.article.pk})
+            self.assertEqual(profile.following_ids, {self.author.profile.pk})
+
+    def test_cached_viewer(self):
+        self.client.force_login(self.reader)
+        url = reverse("profile_detail", args=[self.author.username])
+        self.client.get(url)
+        with instrument() as cached:
+            self.client.get(url)
+        with override_settings(VIEWER_CACHE_TIMEOUT=0):
+            with instrument() as uncached:
+                self.client.get(url)
+        # the user with their profile, and their favorites and follows
+        self.assertEqual(uncached.query_count - cached.query_count, 2)
+
+        follow_url = reverse("profile_follow", args=[self.author.username])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(follow_url)
+        self.assertContains(self.client.get(url), "Unfollow")
+
+
+class FollowersCountTests(TestCase):
+    """followers_count follows changes from both sides of `Profile.follows`"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profiles = [
+            User.objects.create_user(f"user{i}", f"user{i}@example.com", "pw").profile
+            for i in range(4)
+        ]
+
+    def assertFollowers(self, counts):
+        profiles = Profile.objects.order_by("pk")
+        self.assertEqual([profile.followers_count for profile in profiles], counts)
+        for profile in profiles:
+            self.assertEqual(profile.followers_count, profile.followed_by.count())
+
+    def test_follows(self):
+        a, b, c, d = self.profiles
+        a.follows.add(b, c)
+        a.follows.add(c, d)
+        self.assertFollowers([0, 1, 1, 1])
+        b.followed_by.add(c, d, a)
+        self.assertFollowers([0, 3, 1, 1])
+        # not followed by `b`: unchanged
+        b.follows.remove(a, c)
+        self.assertFollowers([0, 3, 1, 1])
+        b.followed_by.remove(c, b)
+        self.assertFollowers([0, 2, 1, 1])
+        d.follows.add(c)
+        a.follows.clear()
+        self.assertFollowers([0, 1, 1, 0])
+        c.followed_by.clear()
+        self.assertFollowers([0, 1, 0, 0])
+        b.followed_by.clear()
+        self.assertFollowers([0, 0, 0, 0])
+
+
+class ToggleTests(ConduitTestCase):
+    """Favorite and follow toggles keep the counters exact"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.article = cls.create_article()
+
+    def assertCounts(self, count):
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual(article.favorites_count, count)
+        self.assertEqual(article.favorites_count, article.favorited.count())
+        author = Profile.objects.get(pk=self.author.profile.pk)
+        self.assertEqual(author.followers_count, count)
+        self.assertEqual(author.followers_count, author.followed_by.count())
+
+    def test_repeated(self):
+        self.client.force_login(self.reader)
+        urls = [
+            reverse(
+                "article_favorite",
+                kwargs={"slug": self.article.slug, "uuid": self.article.uuid},
+            ),
+            reverse("profile_follow", args=[self.author.username]),
+        ]
+        for count in (1, 0, 1, 0):
+            for url in urls:
+                response = self.client.post(url, headers={"HX-Request": "true"})
+                self.assertEqual(response.status_code, 200)
+            self.assertCounts(count)
+
+    def test_concurrent(self):
+        delete = QuerySet.delete
+        other = Profile.objects.get(pk=self.reader.profile.pk)
+        profile = self.reader.profile
+
+        for toggle, obj in (
+            ("toggle_favorite", self.article),
+            ("toggle_follow", self.author.profile),
+        ):
+
+            def delete_then_toggle(queryset):
+                # another request toggles between the DELETE and the INSERT
+                result = delete(queryset)
+                with mock.patch.object(QuerySet, "delete", delete):
+                    getattr(other, toggle)(obj)
+                return result
+
+            with mock.patch.object(QuerySet, "delete", delete_then_toggle):
+                self.assertTrue(getattr(profile, toggle)(obj))
+        self.assertCounts(1)
+
+
+class ProvisioningTests(TestCase):
+    def test_provision_users(self):
+        User.objects.create_user("taken", "taken@example.com", "pw")
+        rows = [
+            {"username": "ada", "email": "ada@example.com", "password": "secret"},
+            {"username": "bob", "email": "bob@example.com", "bio": "Hi"},
+            {"username": "taken", "email": "other@example.com"},
+            {"username": "ada", "email": "ada2@example.com"},
+            {"username": "", "email": "nobody@example.com"},
+            {"username": "cyd", "email": "not an email"},
+        ]
+        result = provision_users(rows, hasher="pbkdf2_sha256_imported", batch_size=2)
+
+        self.assertEqual((result.created, result.skipped), (2, 2))
+        self.assertEqual([number for number, _ in result.errors], [5, 6])
+        self.assertEqual(Profile.objects.get(user__username="bob").bio, "Hi")
+        self.assertFalse(User.objects.get(username="bob").has_usable_password())
+
+        # the imported hash is replaced by the preferred one on login
+        self.assertTrue(self.client.login(email="ada@example.com", password="secret"))
+        password = User.objects.get(username="ada").password
+        self.assertTrue(password.startswith("pbkdf2_sha256$"))
+
+    def test_password_hash(self):
+        rows = [
+            {
+                "username": "ada",
+                "email": "ada@example.com",
+                "password_hash": make_password("secret"),
+            },
+            {"username": "bob", "email": "bob@example.com", "password_hash": "x$y"},
+        ]
+        result = provision_users(rows)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(len(result.errors), 1)
+        self.assertTrue(User.objects.get(username="ada").check_password("secret"))
@@ -0,0 +1,21 @@
+from .models import Profile
+
+
+async def aget_viewer(request):
+    """
+    Resolve `request.user` from async views, with the profile and the social
+    graph templates need (see `Profile._social_graph`).
+
+    `request.user` is a lazy object loading the user synchronously, which
+    async code can't do: it's replaced by the user loaded with
+    `request.auser()`, and the rest of the request can use it freely.
+    """
+
+    user = await request.auser()
+    request.user = user
+    if user.is_authenticated:
+        # conduit.users.backends.ViewerBackend loads it with the user
+        if "profile" not in user._state.fields_cache:
+            user.profile = await Profile.objects.aget(user=user)
+        await user.profile.aload_social_graph()
+    return user
@@ -1,14 +1,24 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate, login, update_session_auth_hash
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.decorators import login_required
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
 from django.contrib.auth import get_user_model
-from django.shortcuts import redirect, render, get_object_or_404
+from django.shortcuts import aget_object_or_404, redirect, render, get_object_or_404
 from django.views.decorators.http import require_http_methods
 
-from .models import User
+from conduit.articles.conditional import conditional_render, page_etag
+from conduit.articles.feeds import feed_queryset
+from conduit.articles.models import Article
+from conduit.articles.pagination import apaginate_request, paginate_request
+from config.instrumentation import query_budget
+
+from .models import Profile, User
 from .forms import ProfileForm, UserForm
+from .viewer import aget_viewer
 
 
 class Login(LoginView):
@@ -47,20 +57,58 @@ class SignUpView(CreateView):
         return redirect(self.success_url)
 
 
-def profile_detail(request, username):
-    """Detail view for user profiles"""
-    
-    user = get_object_or_404(User, username=username)
+def _profile_articles(request, user):
+    """Articles of the current tab of the profile page of `user`"""
+
+    if request.resolver_match.url_name == "profile_favorites":
+        if request.user.is_authenticated:
+            return request.user.profile.favorites.all()
+        return Article.objects.none()
+    return user.profile.articles.all()
+
+
+def _render_profile(request, user, page):
     profile = user.profile
     context = {"profile": profile}
+    etag = page_etag(request, page, profiles=[user.pk], extra=[page.next_cursor])
+
+    def render_profile():
+        # htmx "load more" requests only need the next page of the list
+        if request.headers.get("HX-Request"):
+            return render(
+                request, "article_list_page.html", {"page": page, **context}
+            )
+
+        context["articles"] = page
+        if request.user.is_authenticated:
+            context["is_following"] = request.user.profile.is_following(profile)
+        return render(request, "profile_detail.html", context)
+
+    return conditional_render(request, etag, render_profile)
+
+
+@query_budget(10)
+def profile_detail(request, username):
+    """Detail view for user profiles"""
     
-    context["my_articles"] = profile.articles.order_by("-created_at")
-    
-    if request.user.is_authenticated:
-        context["is_following"] = request.user.profile.is_following(profile)
-        context["favorited_articles"] = request.user.profile.favorites.order_by("-created_at")
-            
-    return render(request, "profile_detail.html", context)
+    user = get_object_or_404(User.objects.select_related("profile"), username=username)
+    # only load the list shown by the current tab
+    page = paginate_request(request, feed_queryset(_profile_articles(request, user)))
+    return _render_profile(request, user, page)
+
+
+@query_budget(10)
+async def aprofile_detail(request, username):
+    """`profile_detail` for ASGI servers (see articles.views.ahome)"""
+
+    user, _ = await asyncio.gather(
+        aget_object_or_404(User.objects.select_related("profile"), username=username),
+        aget_viewer(request),
+    )
+    page = await apaginate_request(
+        request, feed_queryset(_profile_articles(request, user))
+    )
+    return await sync_to_async(_render_profile)(request, user, page)
 
 
 @login_required
@@ -91,20 +139,24 @@ def profile_update(request):
     return render(request, "settings.html", context)
 
 
+@query_budget(12)
 @login_required
 @require_http_methods(["POST"])
 def profile_follow(request, username):
     """View for Follow or unfollow a user profile."""
     
-    user_to_follow = get_object_or_404(User, username=username)
-    profile_to_follow = user_to_follow.profile
+    profile_to_follow = get_object_or_404(
+        Profile.objects.select_related("user"), user__username=username
+    )
     
     current_profile = request.user.profile
     
-    if current_profile.is_following(profile_to_follow):
-        current_profile.unfollow(profile_to_follow)
-    else:
-        current_profile.follow(profile_to_follow)
+    is_following = current_profile.toggle_follow(profile_to_follow)
+
+    # htmx only needs the updated button
+    if request.headers.get("HX-Request"):
+        context = {"profile": profile_to_follow, "is_following": is_following}
+        return render(request, "profile_follow.html", context)
         
     next_url = request.POST.get("next")
     if next_url:
@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from config.static import StaticFilesASGI
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# async views and no persistent connections, see ASGI in config/settings.py
+os.environ.setdefault('CONDUIT_ASGI', '1')
 
-application = get_asgi_application()
+# collected static files are served before Django
+application = StaticFilesASGI(get_asgi_application())
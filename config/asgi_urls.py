@@ -0,0 +1,22 @@
+"""
+URL configuration of ASGI deployments (see config/asgi.py).
+
+The most requested read views are routed to their async versions, which load
+their data with the async ORM instead of occupying a thread of the server
+for the whole request. Everything else is the same as config/urls.py: the
+first matching pattern wins, and both patterns reverse to the same URL.
+"""
+
+from django.urls import path
+
+from conduit.articles import views as article_views
+from conduit.users import views as user_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("", article_views.ahome, name="home"),
+    path("article/<slug:slug>-<uuid:uuid>", article_views.aarticle_detail, name="article_detail"),
+    path("profile/@<str:username>", user_views.aprofile_detail, name="profile_detail"),
+    path("profile/@<str:username>/favorites", user_views.aprofile_detail, name="profile_favorites"),
+] + sync_urlpatterns
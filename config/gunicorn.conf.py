@@ -0,0 +1,32 @@
+"""
+Gunicorn settings for both deployment paths:
+
+    gunicorn -c config/gunicorn.conf.py                   # WSGI, threads
+    CONDUIT_ASGI=1 gunicorn -c config/gunicorn.conf.py    # ASGI, event loops
+
+WSGI workers serve a request per thread, with the sync views. ASGI workers
+(uvicorn's, from the uvicorn-worker package) run an event loop each, with
+the async versions of the read views (see config/asgi_urls.py). Both read
+their bind address, number of workers and threads from the environment,
+see `manage.py bench_servers` to compare them.
+"""
+
+import multiprocessing
+import os
+
+asgi = os.environ.get("CONDUIT_ASGI") == "1"
+
+bind = os.environ.get("CONDUIT_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("CONDUIT_WORKERS", multiprocessing.cpu_count()))
+
+if asgi:
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "config.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.environ.get("CONDUIT_THREADS", 8))
+
+# requests are short: keep connections of benchmarks and proxies open
+keepalive = 30
+timeout = 30
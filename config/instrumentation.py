@@ -0,0 +1,262 @@
+"""
+Per-request instrumentation.
+
+`instrument()` records, for the code running in its block, every SQL query
+(with its time and a fingerprint: the SQL with its parameters left out, so
+that an N+1 shows up as a fingerprint run many times) and the time spent
+rendering each template. `InstrumentationMiddleware` instruments every
+request, logs a summary to the "conduit.instrumentation" logger, adds a
+`Server-Timing` header and checks the query budget declared on the view with
+`@query_budget(n)`: going over it logs a warning, or raises
+`QueryBudgetExceeded` when QUERY_BUDGETS_STRICT is set, as in tests.
+
+Queries are recorded by an execute wrapper that every database connection
+gets when it opens, so that those opened in other threads or async contexts
+are covered too. Templates are timed when they're loaded by
+`InstrumentedLoader` (see TEMPLATES in config/settings.py).
+"""
+
+import logging
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.loaders import cached
+
+logger = logging.getLogger("conduit.instrumentation")
+
+# collapse `IN (%s, %s, ...)` lists of any length and whitespace
+_PARAMS_LIST_RE = re.compile(r"\((?:%s, )+%s\)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """`sql` without what changes between runs of the same query"""
+    return _SPACES_RE.sub(" ", _PARAMS_LIST_RE.sub("(%s, ...)", sql)).strip()
+
+
+class Stats:
+    """What was recorded by `instrument()`"""
+
+    def __init__(self):
+        self.queries = []
+        self.templates = defaultdict(lambda: [0, 0.0])
+        self.template_time = 0.0
+        self._template_depth = 0
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def sql_time(self):
+        """Total SQL time, in seconds"""
+        return sum(query["time"] for query in self.queries)
+
+    @property
+    def duplicates(self):
+        """`{fingerprint: count}` of the queries that ran more than once"""
+        counts = Counter(query["fingerprint"] for query in self.queries)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+    def as_dict(self):
+        return {
+            "queries": self.query_count,
+            "sql_ms": round(self.sql_time * 1000, 2),
+            "template_ms": round(self.template_time * 1000, 2),
+            "templates": {
+                name: {"count": count, "ms": round(seconds * 1000, 2)}
+                for name, (count, seconds) in self.templates.items()
+            },
+            "duplicates": self.duplicates,
+        }
+
+
+# the Stats of the enclosing instrument() blocks: mutable objects, so that
+# queries made in a copy of the context (e.g. sync code called from async
+# code) are recorded too
+_active = ContextVar("instrumentation_stats", default=())
+
+
+def _record_query(execute, sql, params, many, context):
+    active = _active.get()
+    if not active:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        query = {
+            "sql": sql,
+            "fingerprint": fingerprint(sql),
+            "time": time.perf_counter() - start,
+            "db": context["connection"].alias,
+        }
+        for stats in active:
+            stats.queries.append(query)
+
+
+@receiver(connection_created)
+def _add_execute_wrapper(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class TimedTemplate:
+    """A loaded template, whose renders are timed in instrument() blocks"""
+
+    def __init__(self, template):
+        # not named `template`: {% include %} would render that one instead
+        self._wrapped = template
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def render(self, context):
+        active = _active.get()
+        if not active:
+            return self._wrapped.render(context)
+        for stats in active:
+            stats._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return self._wrapped.render(context)
+        finally:
+            elapsed = time.perf_counter() - start
+            for stats in active:
+                stats._template_depth -= 1
+                # per template times include the templates it includes
+                entry = stats.templates[self._wrapped.name or "<string>"]
+                entry[0] += 1
+                entry[1] += elapsed
+                if not stats._template_depth:
+                    stats.template_time += elapsed
+
+
+class InstrumentedLoader(cached.Loader):
+    """The cached template loader, returning templates timed by instrument()"""
+
+    def get_template(self, template_name, skip=None):
+        return TimedTemplate(super().get_template(template_name, skip))
+
+
+@contextmanager
+def instrument(budget=None):
+    """
+    Record the queries and template renders of this block in the `Stats`
+    it yields. Raise `QueryBudgetExceeded` if it ran more than `budget`
+    queries.
+    """
+
+    # connections opened before this module was imported, e.g. by the test
+    # runner, didn't get the wrapper
+    for connection in connections.all(initialized_only=True):
+        _add_execute_wrapper(None, connection)
+    stats = Stats()
+    token = _active.set((*_active.get(), stats))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+    if budget is not None and stats.query_count > budget:
+        raise QueryBudgetExceeded(_budget_message(stats, budget))
+
+
+def _budget_message(stats, budget, name="block"):
+    lines = [f"{name} ran {stats.query_count} queries, over its budget of {budget}"]
+    lines += [f"  {count} x {sql}" for sql, count in stats.duplicates.items()]
+    return "\n".join(lines)
+
+
+def query_budget(budget):
+    """Declare the maximum number of queries of a request to the view"""
+
+    def decorator(view):
+        # kept by the decorators applied over this one, they use wraps()
+        view.query_budget = budget
+        return view
+
+    return decorator
+
+
+class InstrumentationMiddleware:
+    """Record the queries and template renders of every request"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with instrument() as stats:
+            response = self.get_response(request)
+        return self._report(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with instrument() as stats:
+            response = await self.get_response(request)
+        return self._report(request, response, stats, time.perf_counter() - start)
+
+    def _report(self, request, response, stats, elapsed):
+        match = request.resolver_match
+        view = match.view_name if match else None
+        budget = getattr(match.func, "query_budget", None) if match else None
+
+        if settings.INSTRUMENTATION_SERVER_TIMING:
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'sql;dur={stats.sql_time * 1000:.1f};desc="{stats.query_count} '
+                    'queries"',
+                    f"tpl;dur={stats.template_time * 1000:.1f}",
+                    f"total;dur={elapsed * 1000:.1f}",
+                ]
+            )
+
+        logger.info(
+            "%s %s %s: %d queries (%d duplicated), sql %.1fms, templates %.1fms, "
+            "total %.1fms",
+            request.method,
+            request.path,
+            response.status_code,
+            stats.query_count,
+            len(stats.duplicates),
+            stats.sql_time * 1000,
+            stats.template_time * 1000,
+            elapsed * 1000,
+            extra={
+                "instrumentation": {
+                    "method": request.method,
+                    "path": request.path,
+                    "view": view,
+                    "status": response.status_code,
+                    "total_ms": round(elapsed * 1000, 2),
+                    "query_budget": budget,
+                    **stats.as_dict(),
+                }
+            },
+        )
+
+        if budget is not None and stats.query_count > budget:
+            message = _budget_message(stats, budget, view)
+            if settings.QUERY_BUDGETS_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import shlex
+import socket
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from config.benchmarks import PERCENTILES, git_revision, percentile
+from conduit.articles.models import Article
+from conduit.users.models import Profile
+
+SERVERS = ("wsgi", "asgi")
+
+
+async def _read_response(reader):
+    """Read an HTTP/1.1 response, return its status and if the connection is kept"""
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed by the server")
+    status = int(status_line.split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get("connection") != "close"
+
+
+async def _load(host, port, path, cookie, concurrency, duration):
+    """
+    Request `path` over `concurrency` keep-alive connections for `duration`
+    seconds: return the latencies in ms and the number of failed requests
+    """
+
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\nCookie: {cookie}\r\n\r\n"
+    ).encode()
+    deadline = time.monotonic() + duration
+    latencies = []
+    errors = 0
+
+    async def connection():
+        nonlocal errors
+        reader = writer = None
+        while time.monotonic() < deadline:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                start = time.perf_counter()
+                writer.write(request)
+                status, keep_alive = await _read_response(reader)
+                latencies.append((time.perf_counter() - start) * 1000)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors += 1
+                keep_alive = False
+            else:
+                if status >= 400:
+                    errors += 1
+            if not keep_alive and writer is not None:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    await asyncio.gather(*(connection() for _ in range(concurrency)))
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput and latency percentiles of the WSGI and ASGI "
+        "deployments (see config/gunicorn.conf.py) at high concurrency: each "
+        "server is started, loaded over many keep-alive connections, and "
+        "stopped. Requires gunicorn, and uvicorn-worker for ASGI. The load is "
+        "generated by this process, keep it on another core than the workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--servers",
+            nargs="+",
+            choices=SERVERS,
+            default=list(SERVERS),
+            help="Deployments to measure (default: both)",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=256, help="Open connections"
+        )
+        parser.add_argument(
+            "--duration", type=float, default=10, help="Seconds of load per view"
+        )
+        parser.add_argument(
+            "--warmup", type=float, default=2, help="Unmeasured seconds per view"
+        )
+        parser.add_argument("--workers", type=int, default=2, help="Server workers")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--command",
+            default="gunicorn -c config/gunicorn.conf.py",
+            help="Command starting a server, configured through the environment",
+        )
+        parser.add_argument(
+            "--output",
+            default=settings.BASE_DIR / "benchmarks-servers.jsonl",
+            type=Path,
+            help="File the results are appended to (default: "
+            "benchmarks-servers.jsonl)",
+        )
+        parser.add_argument("--label", default="", help="Stored with the results")
+
+    def handle(self, *args, servers, port, output, label, **options):
+        viewer = (
+            Profile.objects.annotate(following=Count("follows"))
+            .select_related("user")
+            .order_by("-following")
+            .first()
+        )
+        article = Article.objects.order_by("-comments_count").first()
+        if viewer is None or article is None:
+            raise CommandError("The database is empty: run generate_fixtures first.")
+        author = Profile.objects.select_related("user").order_by("-followers_count")[0]
+
+        # the servers read the session from the database
+        client = Client()
+        client.force_login(viewer.user)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+        cookie = f"{settings.SESSION_COOKIE_NAME}={session}"
+        # the async versions of these views are served under ASGI
+        scenarios = {
+            "home": reverse("home"),
+            "article_detail": article.get_absolute_url(),
+            "profile_detail": reverse("profile_detail", args=[author.user.username]),
+        }
+
+        results = {}
+        for server in servers:
+            with self.server(server, port, options):
+                for name, path in scenarios.items():
+                    key = f"{server} {name}"
+                    results[key] = self.measure(port, path, cookie, options)
+                    self.write_result(key, results[key])
+
+        run = {
+            "revision": git_revision(),
+            "label": label,
+            "date": timezone.now().isoformat(),
+            "concurrency": options["concurrency"],
+            "workers": options["workers"],
+            "results": results,
+        }
+        with open(output, "a") as f:
+            f.write(json.dumps(run) + "\n")
+        self.stdout.write(f"Results appended to {output}.")
+        if set(SERVERS) <= set(servers):
+            self.compare(scenarios, results)
+
+    @contextmanager
+    def server(self, server, port, options):
+        """Run the `server` deployment on `port` within the block"""
+
+        env = {
+            **os.environ,
+            "CONDUIT_ASGI": "1" if server == "asgi" else "0",
+            "CONDUIT_BIND": f"127.0.0.1:{port}",
+            "CONDUIT_WORKERS": str(options["workers"]),
+        }
+        try:
+            process = subprocess.Popen(
+                shlex.split(options["command"]),
+                cwd=settings.BASE_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError as exc:
+            raise CommandError(f"Can't start the {server} server: {exc}")
+        try:
+            self.wait_for(process, port)
+            yield
+        finally:
+            process.terminate()
+            process.wait()
+
+    def wait_for(self, process, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"The server exited with {process.returncode}.")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"The server didn't listen on port {port}.")
+
+    def measure(self, port, path, cookie, options):
+        load = ("127.0.0.1", port, path, cookie, options["concurrency"])
+        asyncio.run(_load(*load, options["warmup"]))
+        latencies, errors = asyncio.run(_load(*load, options["duration"]))
+        if not latencies:
+            raise CommandError(f"No request to {path} succeeded.")
+
+        latencies.sort()
+        return {
+            "rps": round(len(latencies) / options["duration"], 1),
+            **{f"p{p}_ms": round(percentile(latencies, p), 2) for p in PERCENTILES},
+            "max_ms": round(latencies[-1], 2),
+            "errors": errors,
+        }
+
+    def write_result(self, name, result):
+        self.stdout.write(
+            f"{name:>20}: {result['rps']:8.1f} req/s "
+            + " ".join(f"p{p} {result[f'p{p}_ms']:8.2f}ms" for p in PERCENTILES)
+            + f" {result['errors']} errors"
+        )
+
+    def compare(self, scenarios, results):
+        self.stdout.write("ASGI compared to WSGI:")
+        for name in scenarios:
+            wsgi, asgi = results[f"wsgi {name}"], results[f"asgi {name}"]
+            throughput = (asgi["rps"] - wsgi["rps"]) / wsgi["rps"] * 100
+            tail = (asgi["p99_ms"] - wsgi["p99_ms"]) / wsgi["p99_ms"] * 100
+            self.stdout.write(
+                f"{name:>20}: throughput {throughput:+6.1f}% p99 {tail:+6.1f}%"
+            )
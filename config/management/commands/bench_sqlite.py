@@ -0,0 +1,115 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from config.sqlite import PRAGMAS
+
+# the settings Django used before config/sqlite.py: rollback journal, deferred
+# transactions and a new connection for every request
+DEFAULT_PROFILE = {"pragmas": {}, "begin": "BEGIN", "persistent": False}
+TUNED_PROFILE = {"pragmas": PRAGMAS, "begin": "BEGIN IMMEDIATE", "persistent": True}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the read/write concurrency of the default SQLite settings with "
+        "the tuned profile of config/sqlite.py, on a scratch database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument(
+            "--rows", type=int, default=10_000, help="Rows in the benchmark table"
+        )
+
+    def handle(self, *args, readers, writers, seconds, rows, **options):
+        for name, profile in (("default", DEFAULT_PROFILE), ("tuned", TUNED_PROFILE)):
+            with tempfile.TemporaryDirectory() as directory:
+                path = Path(directory) / "bench.sqlite3"
+                _create_database(path, profile, rows)
+                result = _run(path, profile, readers, writers, seconds, rows)
+            self.stdout.write(
+                f"{name:>8}: {result['reads'] / seconds:10.0f} reads/s "
+                f"{result['writes'] / seconds:8.0f} writes/s "
+                f"{result['locked']:6d} 'database is locked' errors"
+            )
+
+
+def _connect(path, profile):
+    # autocommit mode: transactions are opened explicitly with profile["begin"]
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for name, value in profile["pragmas"].items():
+        connection.execute(f"PRAGMA {name}={value}")
+    return connection
+
+
+def _create_database(path, profile, rows):
+    connection = _connect(path, profile)
+    connection.execute(
+        "CREATE TABLE article (id INTEGER PRIMARY KEY, title TEXT, favorites INTEGER)"
+    )
+    connection.executemany(
+        "INSERT INTO article (title, favorites) VALUES (?, 0)",
+        ((f"article {i}",) for i in range(rows)),
+    )
+    connection.close()
+
+
+def _run(path, profile, readers, writers, seconds, rows):
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def worker(operation):
+        connection = _connect(path, profile) if profile["persistent"] else None
+        i = 0
+        while time.monotonic() < deadline:
+            i += 1
+            conn = connection or _connect(path, profile)
+            try:
+                operation(conn, i % rows + 1)
+            except sqlite3.OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                count("locked")
+            finally:
+                if connection is None:
+                    conn.close()
+        if connection is not None:
+            connection.close()
+
+    def read(conn, pk):
+        conn.execute(
+            "SELECT id, title, favorites FROM article "
+            "WHERE id >= ? ORDER BY id LIMIT 20",
+            (pk,),
+        ).fetchall()
+        count("reads")
+
+    def write(conn, pk):
+        # read-modify-write, like a request toggling a favorite
+        conn.execute(profile["begin"])
+        conn.execute("SELECT favorites FROM article WHERE id = ?", (pk,)).fetchone()
+        conn.execute("UPDATE article SET favorites = favorites + 1 WHERE id = ?", (pk,))
+        conn.execute("COMMIT")
+        count("writes")
+
+    threads = [threading.Thread(target=worker, args=(read,)) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=(write,)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from config.routers import PRIMARY
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database to the DATABASE_REPLICAS, standing in "
+        "for replication when running with local replica files"
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No DATABASE_REPLICAS are configured.")
+
+        databases = [PRIMARY, *settings.DATABASE_REPLICAS]
+        if any(connections[alias].vendor != "sqlite" for alias in databases):
+            raise CommandError("Only SQLite databases can be synced.")
+
+        # the backup API copies a consistent snapshot, even while writes go on
+        source = sqlite3.connect(connections[PRIMARY].settings_dict["NAME"])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                connections[alias].close()
+                target = sqlite3.connect(connections[alias].settings_dict["NAME"])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Synced {alias}.")
+        finally:
+            source.close()
@@ -0,0 +1,86 @@
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.static import VENDORED
+
+# url(...) references of stylesheets, quoted or not, except data URIs
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)(?!data:)([^'")]+)\1\s*\)""")
+# Google Fonts answers woff2 fonts to browsers supporting them only
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0 Safari/537.36"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Download the third-party assets of the pages (config.static.VENDORED) "
+        "to conduit/static, with the files their stylesheets load, so that "
+        "collectstatic fingerprints and compresses them and pages load them "
+        "from this site. Commit the result."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory",
+            type=Path,
+            default=settings.APPS_DIR / "static",
+            help="Static files directory to write to (default: conduit/static)",
+        )
+
+    def handle(self, *args, directory, **options):
+        for name, url in VENDORED.items():
+            self.vendor(directory, name, url)
+
+    def fetch(self, url):
+        try:
+            with urlopen(Request(url, headers={"User-Agent": USER_AGENT})) as f:
+                return f.read()
+        except OSError as exc:
+            raise CommandError(f"Can't download {url}: {exc}")
+
+    def write(self, directory, name, content):
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        self.stdout.write(f"{name}: {len(content)} bytes")
+
+    def vendor(self, directory, name, url):
+        content = self.fetch(url)
+        if name.endswith(".css"):
+            content = self.vendor_css_urls(directory, name, url, content.decode())
+            content = content.encode()
+        self.write(directory, name, content)
+
+    def vendor_css_urls(self, directory, name, url, css):
+        """
+        Download the files loaded by the stylesheet `name`, fetched from
+        `url`, and point it to them. Relative references keep their path,
+        those to other origins are stored next to the stylesheet.
+        """
+
+        base = posixpath.dirname(name)
+        vendored = set()
+
+        def replace(match):
+            reference = match.group(2).strip()
+            source = urljoin(url, reference)
+            if urlsplit(reference).scheme or reference.startswith("//"):
+                # e.g. fonts.gstatic.com/s/font/v1/x.woff2 -> s/font/v1/x.woff2
+                reference = urlsplit(source).path.lstrip("/")
+            target = posixpath.normpath(
+                posixpath.join(base, urlsplit(reference).path)
+            )
+            if target not in vendored:
+                vendored.add(target)
+                # the query and fragment (e.g. "?#iefix") stay in the reference
+                self.write(directory, target, self.fetch(source.split("#")[0]))
+            return f'url("{reference}")'
+
+        return CSS_URL_RE.sub(replace, css)
@@ -0,0 +1,124 @@
+"""
+Read replicas.
+
+`ReplicaRouter` sends the reads of the replicated apps to one of the
+DATABASE_REPLICAS, and every write to the primary ("default") database.
+`ReplicaPinningMiddleware` sends all the reads of a request to the primary
+when it may write (unsafe method), and for REPLICA_PIN_SECONDS after a
+request wrote, through a cookie, so that users read their own writes even
+while the replicas lag behind.
+
+Replicas that are the primary database, like the test mirrors of
+DATABASE_REPLICAS, are read through the primary connection: reads through a
+connection of their own wouldn't see the writes of its open transaction.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = "default"
+PIN_COOKIE = "pin_primary"
+
+
+class _State:
+    """Replica routing state of the current request"""
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# a mutable object, so that writes made by code running in a copy of the
+# context (e.g. sync code called from async code) are seen by the middleware
+_state = ContextVar("replica_state", default=None)
+
+
+@contextmanager
+def use_primary(pinned=True):
+    """Send the reads made in this block to the primary database"""
+    state = _State(pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def _replicas():
+    primary = connections[PRIMARY].settings_dict["NAME"]
+    return [
+        alias
+        for alias in settings.DATABASE_REPLICAS
+        if connections[alias].settings_dict["NAME"] != primary
+    ]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.pinned:
+            return PRIMARY
+        if model._meta.app_label not in settings.REPLICATED_APPS:
+            return PRIMARY
+        replicas = _replicas()
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, **hints):
+        # replicas get their schema from the primary
+        return db == PRIMARY
+
+
+class ReplicaPinningMiddleware:
+    """Read-your-writes: pin users who just wrote to the primary database"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with use_primary(self._must_pin(request)) as state:
+            response = self.get_response(request)
+        return self._pin_client(response, state)
+
+    async def __acall__(self, request):
+        with use_primary(self._must_pin(request)) as state:
+            response = await self.get_response(request)
+        return self._pin_client(response, state)
+
+    def _must_pin(self, request):
+        return request.method not in ("GET", "HEAD", "OPTIONS") or bool(
+            request.COOKIES.get(PIN_COOKIE)
+        )
+
+    def _pin_client(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from config.sqlite import sqlite_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 # Path that point to counduit folder
@@ -41,10 +44,17 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "conduit.articles",
     "conduit.users",
+    "conduit.api",
+    "conduit.jobs",
+    # the project-wide management commands
+    "config",
 ]
 
 MIDDLEWARE = [
+    "config.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "config.routers.ReplicaPinningMiddleware",
+    "conduit.articles.pagecache.PageCacheMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -53,18 +63,33 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "config.urls"
+# Set by config/asgi.py: ASGI servers route the hot read views to their async
+# versions (config/asgi_urls.py)
+ASGI = os.environ.get("CONDUIT_ASGI") == "1"
+
+ROOT_URLCONF = "config.asgi_urls" if ASGI else "config.urls"
 
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [APPS_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Django's default loaders, cached, with renders timed by the
+            # instrumentation (see config/instrumentation.py)
+            "loaders": [
+                (
+                    "config.instrumentation.InstrumentedLoader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "conduit.users.context_processors.viewer",
             ],
         },
     },
@@ -76,13 +101,34 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite tuned for concurrent requests: WAL, immediate write transactions and
+# persistent connections (see config/sqlite.py)
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": sqlite_database(BASE_DIR / "db.sqlite3"),
 }
 
+# Read replicas (see config/routers.py): CONDUIT_REPLICAS lists SQLite files,
+# separated by commas, standing in for replicas of db.sqlite3 and refreshed
+# with `manage.py sync_replicas`. In tests, they mirror the test database and
+# are read through the primary connection.
+DATABASE_REPLICAS = []
+for path in filter(None, os.environ.get("CONDUIT_REPLICAS", "").split(",")):
+    alias = f"replica{len(DATABASE_REPLICAS) + 1}"
+    DATABASES[alias] = sqlite_database(path, TEST={"MIRROR": "default"})
+    DATABASE_REPLICAS.append(alias)
+
+# Under ASGI, the queries of each request run in a thread of their own that
+# ends with it: connections kept open would be leaked, not reused
+if ASGI:
+    for database in DATABASES.values():
+        database["CONN_MAX_AGE"] = 0
+
+DATABASE_ROUTERS = ["config.routers.ReplicaRouter"]
+# apps whose reads go to the replicas
+REPLICATED_APPS = {"articles", "users"}
+# how long users who wrote keep reading from the primary, to see their writes
+REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -102,6 +148,16 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Django's defaults, plus the cheaper hasher used for provisioned users
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+    "conduit.users.hashers.ImportedPasswordHasher",
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -120,10 +176,143 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [APPS_DIR / "static"]
+# collectstatic writes the files with hashed names and compressed variants
+# there, config/wsgi.py and config/asgi.py serve them (see config/static.py)
+STATIC_ROOT = BASE_DIR / "staticfiles"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # with DEBUG (development, tests), files are linked by their name and served
+    # by the finders without being collected
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "config.static.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
+# files without a hash in their name may change: browsers check them this often
+STATIC_UNHASHED_MAX_AGE = 60
 
 
 # Custom user model to tell Django that we're not using the defaul User model
 AUTH_USER_MODEL = "users.User"
 
+# ViewerBackend loads the user with their profile and caches them, with their
+# favorites and follows, for VIEWER_CACHE_TIMEOUT seconds (0 disables it; see
+# conduit/users/backends.py). ModelBackend still serves the sessions opened
+# before it was added.
+AUTHENTICATION_BACKENDS = [
+    "conduit.users.backends.ViewerBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+VIEWER_CACHE_TIMEOUT = 60 * 5
+
+# sessions are read from the cache, and from the database on a miss
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+
+LOGIN_URL = "/login"
+
+
+# Number of articles rendered per feed page (and per "load more" fragment)
+ARTICLES_PAGE_SIZE = 20
+# Number of comments rendered per article page (and per "show more" fragment)
+COMMENTS_PAGE_SIZE = 20
+
+# Cached article previews are versioned, the timeout only bounds their memory use
+ARTICLE_PREVIEW_CACHE_TIMEOUT = 60 * 60 * 24
+
+# How article bodies are rendered to HTML: "linebreaks" or "markdown" (which
+# requires the markdown package). Bodies are rendered again when this changes.
+ARTICLE_BODY_RENDERER = "linebreaks"
+
+# "Popular Tags" sidebar: number of tags shown and how long the list is cached
+POPULAR_TAGS_COUNT = 20
+POPULAR_TAGS_CACHE_TIMEOUT = 60
+
+# Full-text search backend (see conduit.articles.search)
+ARTICLE_SEARCH_BACKEND = "conduit.articles.search.SQLiteFTS5Backend"
+
+
+# Materialized follow feeds (see conduit.articles.timeline): when enabled, new
+# articles are copied to the followers' timelines by background jobs
+TIMELINE_ENABLED = False
+# authors with more followers than this are merged into feeds when they're read
+TIMELINE_FANOUT_MAX_FOLLOWERS = 10_000
+# number of recent articles copied to a timeline when following someone
+TIMELINE_BACKFILL_SIZE = 100
+
+# Live article updates over Server-Sent Events (see conduit.articles.live):
+# only ASGI workers hold the streams cheaply, article pages open them there
+LIVE_EVENTS_ENABLED = ASGI
+# LocalBackend, or RedisBackend (redis package) to publish events to the
+# streams of every process, e.g. with several workers
+LIVE_EVENTS_BACKEND = "conduit.articles.live.LocalBackend"
+LIVE_EVENTS_REDIS_URL = "redis://localhost:6379/0"
+# idle streams get a comment this often, so that proxies keep them open
+LIVE_EVENTS_HEARTBEAT = 15
+# events queued per stream: a client too slow to read them misses the next ones
+LIVE_EVENTS_QUEUE_SIZE = 100
+
+# Background jobs (see conduit.jobs.queue), run by `manage.py runworker`, or in
+# the process enqueuing them when JOBS_EAGER is set
+JOBS_EAGER = False
+# failed jobs are retried after JOBS_RETRY_DELAY seconds, doubled every time
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 10
+# most jobs of a batch task run at once, e.g. articles indexed together
+JOBS_BATCH_SIZE = 100
+# a worker runs its jobs for this long before others may take them over
+JOBS_LEASE_TIMEOUT = 60 * 5
+# idle workers check for new jobs this often, in seconds
+JOBS_POLL_INTERVAL = 1
+
+# JSON API (see conduit.api): lifetime of the tokens clients get by logging in,
+# and most rows of a list answered at once (they're streamed)
+API_TOKEN_MAX_AGE = 60 * 60 * 24 * 30
+API_MAX_LIMIT = 500
+
+# Query and template instrumentation (see config/instrumentation.py): expose
+# the timings of each request in a Server-Timing header, and raise instead of
+# logging a warning when a view goes over its @query_budget (tests set it).
+# CONDUIT_LOG_REQUESTS=1 logs the summary of every request.
+INSTRUMENTATION_SERVER_TIMING = DEBUG
+QUERY_BUDGETS_STRICT = False
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "conduit.instrumentation": {
+            "handlers": ["console"],
+            "level": (
+                "INFO" if os.environ.get("CONDUIT_LOG_REQUESTS") == "1" else "WARNING"
+            ),
+        },
+    },
+}
 
-LOGIN_URL = "/login"
\ No newline at end of file
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # anonymous pages (see conduit.articles.pagecache): any cache backend works,
+    # e.g. django.core.cache.backends.filebased.FileBasedCache, or RedisCache
+    # (redis package) to share them between servers. With several processes,
+    # "default", which holds the versions dropped on writes, must be shared too.
+    "pages": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "pages",
+    },
+}
+PAGE_CACHE_ALIAS = "pages"
+# pages are re-rendered after this many seconds even if nothing changed...
+PAGE_CACHE_TIMEOUT = 60
+# ...and stale copies are kept this long, to serve while one request renders
+PAGE_CACHE_STALE_TIMEOUT = 60 * 10
+# requests wait this long for a page being rendered when there's no copy of it
+PAGE_CACHE_LOCK_WAIT = 2
+# how long a page render may take before another request tries
+PAGE_CACHE_LOCK_TIMEOUT = 10
@@ -0,0 +1,270 @@
+"""
+Static files: fingerprinted, precompressed, served before Django.
+
+`collectstatic` copies the static files to STATIC_ROOT through
+`CompressedManifestStaticFilesStorage`: every file also gets a copy named
+after a hash of its content (main.css -> main.3f2a9c1b04e7.css), which
+`{% static %}` links to, and compressible files get gzip and, when the
+brotli package is installed, brotli variants (main.3f2a9c1b04e7.css.gz,
+.br) compressed once, at the highest level.
+
+`StaticFilesWSGI` and `StaticFilesASGI` wrap the applications of
+config/wsgi.py and config/asgi.py and answer requests to STATIC_URL from
+STATIC_ROOT without going through Django: the files are indexed when the
+server starts, each request picks the variant the client accepts and is
+answered with the file itself (with sendfile when the server supports it).
+Hashed files never change, they're cacheable forever ("immutable"). A proxy
+may serve STATIC_ROOT as well, its variants are the ones nginx's
+gzip_static and brotli_static look for.
+
+Third-party assets are vendored in conduit/static/vendor, so pages don't
+depend on other origins: `manage.py vendor_static` downloads the VENDORED
+files, and the stylesheets and fonts they load. Thinkster's main.css isn't
+committed yet, base.html links it from its origin until it is.
+"""
+
+import asyncio
+import gzip
+import json
+import mimetypes
+import os
+from email.utils import formatdate
+from urllib.parse import urlsplit
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# vendored static files (see `manage.py vendor_static`) and where they come from
+VENDORED = {
+    # Thinkster's theme of the RealWorld apps
+    "vendor/conduit/main.css": "https://demo.productionready.io/main.css",
+    "vendor/ionicons/css/ionicons.min.css": (
+        "https://code.ionicframework.com/ionicons/2.0.1/css/ionicons.min.css"
+    ),
+    "vendor/fonts/fonts.css": (
+        "https://fonts.googleapis.com/css?family=Titillium+Web:700"
+        "|Source+Serif+Pro:400,700|Merriweather+Sans:400,700"
+        "|Source+Sans+Pro:400,300,600,700,300italic,400italic,600italic,"
+        "700italic"
+    ),
+    "vendor/htmx/htmx.min.js": "https://unpkg.com/htmx.org@2.0.4/dist/htmx.min.js",
+}
+
+# extensions of the files worth compressing: fonts like woff2 already are
+COMPRESSIBLE = {
+    ".css",
+    ".js",
+    ".map",
+    ".json",
+    ".svg",
+    ".txt",
+    ".xml",
+    ".html",
+    ".ico",
+    ".ttf",
+    ".otf",
+    ".eot",
+}
+# variants by encoding, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+_CHUNK_SIZE = 64 * 1024
+
+
+def compress(path):
+    """Write the compressed variants of the file at `path` worth keeping"""
+
+    with open(path, "rb") as f:
+        content = f.read()
+    variants = {".gz": lambda: gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = lambda: brotli.compress(content)
+    for suffix, compressor in variants.items():
+        compressed = compressor()
+        # serving a variant saving a few bytes isn't worth the header
+        if len(compressed) < len(content) * 0.95:
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage writing compressed variants of the files"""
+
+    # files not collected (development, tests) are linked by their name
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                compress(self.path(name))
+
+
+class StaticFile:
+    """A collected file and its compressed variants"""
+
+    def __init__(self, path, immutable):
+        self.path = path
+        stat = os.stat(path)
+        content_type, _ = mimetypes.guess_type(path)
+        self.headers = {
+            "Content-Type": content_type or "application/octet-stream",
+            "Cache-Control": (
+                IMMUTABLE
+                if immutable
+                else f"public, max-age={settings.STATIC_UNHASHED_MAX_AGE}"
+            ),
+            "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+            "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        }
+        self.variants = {
+            encoding: (path + suffix, os.path.getsize(path + suffix))
+            for encoding, suffix in ENCODINGS.items()
+            if os.path.exists(path + suffix)
+        }
+        self.variants[None] = (path, stat.st_size)
+        if len(self.variants) > 1:
+            self.headers["Vary"] = "Accept-Encoding"
+
+    def respond(self, accept_encoding, if_none_match):
+        """The status, headers and file answering a request, None for a 304"""
+
+        if if_none_match and self.headers["ETag"] in if_none_match:
+            return 304, self.headers, None
+        accepted = _accepted_encodings(accept_encoding)
+        encoding = next(
+            (
+                encoding
+                for encoding in ENCODINGS
+                if encoding in accepted and encoding in self.variants
+            ),
+            None,
+        )
+        path, size = self.variants[encoding]
+        headers = {**self.headers, "Content-Length": str(size)}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return 200, headers, path
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for item in header.split(","):
+        encoding, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") not in ("q=0", "q=0.0", "q=0.00"):
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class StaticFiles:
+    """The files collected in STATIC_ROOT, by URL path"""
+
+    def __init__(self, root, url):
+        self.prefix = urlsplit(url).path
+        self.files = {}
+        if not root or not os.path.isdir(root):
+            return
+        hashed = self._hashed_names(root)
+        suffixes = tuple(ENCODINGS.values())
+        for directory, _, names in os.walk(root):
+            for filename in names:
+                if filename.endswith(suffixes):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, "/")
+                self.files[self.prefix + name] = StaticFile(path, name in hashed)
+
+    @staticmethod
+    def _hashed_names(root):
+        try:
+            with open(os.path.join(root, "staticfiles.json")) as f:
+                return set(json.load(f)["paths"].values())
+        except (OSError, ValueError, KeyError):
+            return set()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(settings.STATIC_ROOT, settings.STATIC_URL)
+
+    def find(self, method, path):
+        if method not in ("GET", "HEAD") or not path.startswith(self.prefix):
+            return None
+        return self.files.get(path)
+
+
+class StaticFilesWSGI:
+    """Serve STATIC_ROOT in front of the WSGI `application`"""
+
+    def __init__(self, application, files=None):
+        self.application = application
+        self.files = StaticFiles.from_settings() if files is None else files
+
+    def __call__(self, environ, start_response):
+        static = self.files.find(environ["REQUEST_METHOD"], environ["PATH_INFO"])
+        if static is None:
+            return self.application(environ, start_response)
+
+        status, headers, path = static.respond(
+            environ.get("HTTP_ACCEPT_ENCODING", ""),
+            environ.get("HTTP_IF_NONE_MATCH"),
+        )
+        start_response(
+            "200 OK" if status == 200 else "304 Not Modified", list(headers.items())
+        )
+        if path is None or environ["REQUEST_METHOD"] == "HEAD":
+            return []
+        # servers provide a wrapper sending the file with sendfile()
+        file_wrapper = environ.get("wsgi.file_wrapper", FileWrapper)
+        return file_wrapper(open(path, "rb"), _CHUNK_SIZE)
+
+
+class StaticFilesASGI:
+    """Serve STATIC_ROOT in front of the ASGI `application`"""
+
+    def __init__(self, application, files=None):
+        self.application = application
+        self.files = StaticFiles.from_settings() if files is None else files
+
+    async def __call__(self, scope, receive, send):
+        static = None
+        if scope["type"] == "http":
+            static = self.files.find(scope["method"], scope["path"])
+        if static is None:
+            return await self.application(scope, receive, send)
+
+        request_headers = dict(scope["headers"])
+        status, headers, path = static.respond(
+            request_headers.get(b"accept-encoding", b"").decode("latin-1"),
+            request_headers.get(b"if-none-match", b"").decode("latin-1"),
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (name.lower().encode(), value.encode())
+                    for name, value in headers.items()
+                ],
+            }
+        )
+        if path is None or scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+        elif "http.response.pathsend" in scope.get("extensions", {}):
+            # the server sends the file itself
+            await send({"type": "http.response.pathsend", "path": path})
+        else:
+            with open(path, "rb") as f:
+                while chunk := await asyncio.to_thread(f.read, _CHUNK_SIZE):
+                    await send(
+                        {"type": "http.response.body", "body": chunk, "more_body": True}
+                    )
+            await send({"type": "http.response.body", "body": b""})
@@ -20,6 +20,7 @@ from django.urls import path, include
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/", include("conduit.api.urls")),
     path("", include("conduit.articles.urls")),
     path("", include("conduit.users.urls")),
 ]